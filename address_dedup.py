@@ -0,0 +1,50 @@
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Coords = Tuple[Optional[float], Optional[float]]
+
+ZIP4_RE = re.compile(r"\b(\d{5})-?\d{4}\b")
+# "Apt 5", "Unit B-2", "Ste. 100", "#12" either as their own component or trailing the street
+UNIT_RE = re.compile(r"(?:\b(?:apt|apartment|unit|ste|suite|bldg|building|rm|room)\b\.?|#)\s*#?\s*[a-z0-9-]+")
+
+
+def canonicalize_address(address: object) -> str:
+    s = str(address or '').lower()
+    s = ZIP4_RE.sub(r"\1", s)
+    s = UNIT_RE.sub('', s)
+    parts = [re.sub(r"\s+", " ", p).strip() for p in s.split(',')]
+    return ', '.join(p for p in parts if p)
+
+
+# Geocode each distinct canonical address once and fan the result back out to every row.
+# With on_result, unique addresses are resolved in chunks and on_result(row_indices, coords)
+# fires after each chunk so callers can checkpoint progress.
+def geocode_unique(addresses: Sequence[str],
+                   geocode_many: Callable[[List[str]], List[Coords]],
+                   on_result: Optional[Callable[[List[int], List[Coords]], None]] = None,
+                   chunk_size: int = 64) -> List[Coords]:
+    canon = [canonicalize_address(a) for a in addresses]
+    rows_by_addr: Dict[str, List[int]] = {}
+    for i, c in enumerate(canon):
+        if c:
+            rows_by_addr.setdefault(c, []).append(i)
+    total = len(canon) - canon.count('')
+    if total:
+        saved = total - len(rows_by_addr)
+        print(f"Dedup: {total} addresses -> {len(rows_by_addr)} unique "
+              f"({saved} lookups saved, ratio {total / max(len(rows_by_addr), 1):.2f}x)")
+    results: List[Coords] = [(None, None)] * len(canon)
+    keys = list(rows_by_addr)
+    step = chunk_size if on_result else max(len(keys), 1)
+    for start in range(0, len(keys), step):
+        chunk = keys[start:start + step]
+        idx: List[int] = []
+        coords: List[Coords] = []
+        for addr, c in zip(chunk, geocode_many(chunk)):
+            for i in rows_by_addr[addr]:
+                results[i] = c
+                idx.append(i)
+                coords.append(c)
+        if on_result:
+            on_result(idx, coords)
+    return results
@@ -1,18 +1,25 @@
+import argparse
 import os
 import sys
-import re
 from typing import Optional, List
 
 try:
+    import numpy as np
     import pandas as pd
 except ModuleNotFoundError:
     print("ERROR: pandas is not installed. Run: python -m pip install pandas openpyxl xlsxwriter", file=sys.stderr)
     sys.exit(1)
 
+from csv_ingest import CHUNK_ROWS, concat_chunks, header_frame, iter_columns
+from lead_funnel import (EXIT_STAGES, STAGES, WITHIN_DAYS, cohort_exits, cohort_funnel, funnel_table, stage_latency,
+                         stage_matrix)
+
 CSV_PATH = r"c:\\Users\\brian\\Downloads\\Aberrant\\Lead Conversion.csv"
 OUTPUT_CSV = r"c:\\Users\\brian\\Downloads\\Aberrant\\Lead_Closing_Ratio_Monthly.csv"
 OUTPUT_XLSX = r"c:\\Users\\brian\\Downloads\\Aberrant\\Lead_Closing_Ratio_Monthly.xlsx"
 
+PROPERTY_COL = 'property name'
+
 # Column name candidates
 CREATED_CANDS = [
     'created on', 'created date', 'lead created', 'created', 'date created', 'lead created on'
@@ -22,15 +29,6 @@ LEASE_APPROVED_CANDS = [
 ]
 
 
-def normalize_text(s: object) -> str:
-    s = "" if pd.isna(s) else str(s)
-    return re.sub(r"\s+", " ", s).strip().lower()
-
-
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    return df.rename(columns={c: normalize_text(c) for c in df.columns})
-
-
 def pick_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
     cols = set(df.columns)
     for cand in candidates:
@@ -44,52 +42,90 @@ def pick_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
     return None
 
 
-def main():
-    if not os.path.exists(CSV_PATH):
-        print(f"ERROR: File not found: {CSV_PATH}", file=sys.stderr)
+# Funnel, exit and latency CSVs sit next to the closing-ratio CSV: X.csv -> X_Funnel.csv, X_Exits.csv, ...
+def sibling_path(path: str, suffix: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{suffix}{ext or '.csv'}"
+
+
+# Rows per calendar month of one stage column (NaT skipped)
+def month_counts(dates: np.ndarray) -> pd.Series:
+    return pd.Series(dates[~np.isnat(dates)].astype('datetime64[M]')).value_counts()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Monthly closing ratio plus a lead-cohort funnel and stage latencies.')
+    p.add_argument('input', nargs='?', default=CSV_PATH)
+    p.add_argument('--output-csv', default=OUTPUT_CSV)
+    p.add_argument('--output-xlsx', default=OUTPUT_XLSX)
+    p.add_argument('--within', action='append', type=int, default=[],
+                   help=f"Funnel window in days from lead creation, repeatable (default: {', '.join(map(str, WITHIN_DAYS))})")
+    p.add_argument('--as-of', type=pd.Timestamp,
+                   help='Date the export was pulled; funnel cohorts younger than a window before it are flagged '
+                        'immature (default: the latest Created On date)')
+    p.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per read chunk')
+    args = p.parse_args(argv)
+    args.within = sorted(set(args.within)) or WITHIN_DAYS
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if not os.path.exists(args.input):
+        print(f"ERROR: File not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
+    # Header only: pick columns before reading any data
     try:
-        df = pd.read_csv(CSV_PATH, dtype=str, low_memory=False)
+        cols = header_frame(args.input)
     except Exception as e:
         print(f"ERROR: Failed to read CSV: {e}", file=sys.stderr)
         sys.exit(1)
 
-    if df is None or df.empty:
-        print("ERROR: CSV is empty.", file=sys.stderr)
-        sys.exit(1)
-
-    df = normalize_columns(df)
-
-    created_col = pick_column(df, CREATED_CANDS)
+    created_col = pick_column(cols, CREATED_CANDS)
     # Prefer exact 'lease - approved' if present
-    if 'lease - approved' in df.columns:
+    if 'lease - approved' in cols.columns:
         lease_appr_col = 'lease - approved'
     else:
-        lease_appr_col = pick_column(df, LEASE_APPROVED_CANDS)
+        lease_appr_col = pick_column(cols, LEASE_APPROVED_CANDS)
 
     if not created_col:
         print("ERROR: Could not find a 'Created On' column.", file=sys.stderr)
-        print("Available columns:", list(df.columns), file=sys.stderr)
+        print("Available columns:", list(cols.columns), file=sys.stderr)
         sys.exit(1)
     if not lease_appr_col:
         print("ERROR: Could not find a 'Lease - Approved' column.", file=sys.stderr)
-        print("Available columns:", list(df.columns), file=sys.stderr)
+        print("Available columns:", list(cols.columns), file=sys.stderr)
         sys.exit(1)
 
-    # Parse dates
-    df['_created'] = pd.to_datetime(df[created_col], errors='coerce')
-    df['_lease_appr'] = pd.to_datetime(df[lease_appr_col], errors='coerce')
+    # Only the stage dates and the property are read (chunked, dates parsed as MM/DD/YYYY). Each chunk is
+    # counted into leads per Created On month and approvals per Lease - Approved month as it arrives, then
+    # kept only as its compact stage matrix and property codes, which the funnel and latency percentiles need
+    stages = list(dict.fromkeys([created_col] + [c for c in STAGES[1:] + EXIT_STAGES + [lease_appr_col]
+                                                 if c != created_col]))
+    lead_counts, appr_counts, blocks, props = [], [], [], []
+    try:
+        for chunk in iter_columns(args.input, stages + [PROPERTY_COL], dates=stages, categories=[PROPERTY_COL],
+                                  chunksize=args.chunk_rows):
+            names, m = stage_matrix(chunk, stages, parse=lambda s: s)
+            lead_counts.append(month_counts(m[:, 0]))
+            appr_counts.append(month_counts(m[:, names.index(lease_appr_col)]))
+            blocks.append(m)
+            if PROPERTY_COL in chunk:
+                props.append(chunk[[PROPERTY_COL]])
+    except Exception as e:
+        print(f"ERROR: Failed to read CSV: {e}", file=sys.stderr)
+        sys.exit(1)
 
-    # Leads by Created On month
-    leads = df.dropna(subset=['_created']).copy()
-    leads['_lead_month'] = leads['_created'].values.astype('datetime64[M]')
-    leads_by_month = leads.groupby('_lead_month').size().rename('Leads').to_frame()
+    if not sum(len(m) for m in blocks):
+        print("ERROR: CSV is empty.", file=sys.stderr)
+        sys.exit(1)
+    m = np.concatenate(blocks)
+    properties = concat_chunks(props)[PROPERTY_COL] if props else None
 
-    # Lease approvals (ignore Application approvals entirely)
-    lease_appr = df.dropna(subset=['_lease_appr']).copy()
-    lease_appr['_approval_month'] = lease_appr['_lease_appr'].values.astype('datetime64[M]')
-    appr_by_month = lease_appr.groupby('_approval_month').size().rename('Lease Approvals').to_frame()
+    # Leads by Created On month; lease approvals (ignore Application approvals entirely)
+    leads_by_month = pd.concat(lead_counts).groupby(level=0).sum().rename('Leads').to_frame()
+    appr_by_month = pd.concat(appr_counts).groupby(level=0).sum().rename('Lease Approvals').to_frame()
 
     # Union months, sorted
     all_months = pd.Index(sorted(set(leads_by_month.index.tolist()) | set(appr_by_month.index.tolist())))
@@ -109,16 +145,27 @@ def main():
     summary = out.reset_index().rename(columns={'index': 'Month'})
     summary['Month'] = summary['Month'].dt.strftime('%b %Y')
 
-    # Save CSV
+    # Cohort funnel (leads created in month M reaching each stage within N days, no rate while the cohort is
+    # younger than N days), the same for cancellations and denials, and stage latencies
+    funnel = cohort_funnel(names, m, args.within, properties, args.as_of)
+    exits = cohort_exits(names, m, args.within, properties, args.as_of)
+    latency = stage_latency(names, m)
+    funnel_csv, exits_csv = sibling_path(args.output_csv, 'Funnel'), sibling_path(args.output_csv, 'Exits')
+    latency_csv = sibling_path(args.output_csv, 'Latency')
+
+    # Save CSVs
     try:
-        summary.to_csv(OUTPUT_CSV, index=False)
+        summary.to_csv(args.output_csv, index=False)
+        funnel.to_csv(funnel_csv, index=False)
+        exits.to_csv(exits_csv, index=False)
+        latency.to_csv(latency_csv, index=False)
     except Exception as e:
         print(f"ERROR: Failed to write CSV: {e}", file=sys.stderr)
 
     # Save Excel: columns chart for counts, line (secondary axis) for closing ratio
     wrote_chart = False
     try:
-        with pd.ExcelWriter(OUTPUT_XLSX, engine='xlsxwriter') as writer:
+        with pd.ExcelWriter(args.output_xlsx, engine='xlsxwriter') as writer:
             summary.to_excel(writer, sheet_name='Closing Ratio', index=False)
             wb = writer.book
             ws = writer.sheets['Closing Ratio']
@@ -141,6 +188,11 @@ def main():
             ws.insert_chart('F2', chart_cols, {'x_scale': 1.25, 'y_scale': 1.25})
             ws.insert_chart('F20', chart_line, {'x_scale': 1.25, 'y_scale': 1.25})
             wrote_chart = True
+
+            for n in args.within:
+                funnel_table(funnel, n).to_excel(writer, sheet_name=f"Funnel {n}d", index=False)
+                funnel_table(exits, n).to_excel(writer, sheet_name=f"Exits {n}d", index=False)
+            latency.to_excel(writer, sheet_name='Latency', index=False)
     except Exception as e:
         print(f"ERROR: Failed to write Excel: {e}", file=sys.stderr)
 
@@ -150,8 +202,18 @@ def main():
     print(f"  Lease - Approved: {lease_appr_col}")
     print("\nMonthly summary:")
     print(summary.to_string(index=False))
-    print(f"\nOutput CSV: {OUTPUT_CSV}")
-    print(f"Output Excel: {OUTPUT_XLSX}{' (with charts)' if wrote_chart else ''}")
+    print(f"\nCohort funnel, % of leads reaching each stage within {args.within[0]} days:")
+    print(funnel_table(funnel, args.within[0]).to_string(index=False))
+    if not exits.empty:
+        print(f"\nCohort exits, % of leads cancelled or denied within {args.within[0]} days:")
+        print(funnel_table(exits, args.within[0]).to_string(index=False))
+    print("\nStage latency (days):")
+    print(latency.to_string(index=False))
+    print(f"\nOutput CSV: {args.output_csv}")
+    print(f"Funnel CSV: {funnel_csv}")
+    print(f"Exits CSV: {exits_csv}")
+    print(f"Latency CSV: {latency_csv}")
+    print(f"Output Excel: {args.output_xlsx}{' (with charts)' if wrote_chart else ''}")
 
 
 if __name__ == '__main__':
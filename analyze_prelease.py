@@ -1,7 +1,8 @@
+import argparse
 import os
 import sys
 import re
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 
 try:
     import pandas as pd
@@ -9,12 +10,17 @@ except ModuleNotFoundError:
     print("ERROR: pandas is not installed. Run: python -m pip install pandas openpyxl xlsxwriter", file=sys.stderr)
     sys.exit(1)
 
+from date_parse import parse_dates
+from lease_status import classify_statuses
+from prelease_engine import (add_common_args, default_window, filter_property, known_beds, print_summaries, property_monthly,
+                             resolve_beds, span, summarize, write_outputs)
+from xlsx_convert import file_sha256
+
 FILE_PATH = r"c:\\Users\\brian\\Downloads\\Aberrant\\Pre-Lease (10).xlsx"
 OUTPUT_CSV = r"c:\\Users\\brian\\Downloads\\Aberrant\\Prelease_Summary_Aug2024_Aug2025.csv"
 OUTPUT_XLSX = r"c:\\Users\\brian\\Downloads\\Aberrant\\Prelease_Summary_Aug2024_Aug2025.xlsx"
-START_DATE = pd.Timestamp('2024-08-01')
-END_DATE = pd.Timestamp('2025-08-31 23:59:59')
-BEDS = 571
+CACHE_DIR = '.prelease_cache'  # parsed details tables, keyed on parser version + workbook hash + sheet
+CACHE_VERSION = 1  # bump when details_table changes what it extracts, so older caches are ignored
 
 STATUS_CANDIDATES = [
     'lease status', 'status', 'resident status', 'lease type', 'type'
@@ -52,8 +58,60 @@ def pick_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
     return None
 
 
-def read_sheet_header_none(xls: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
-    return pd.read_excel(xls, sheet_name=sheet_name, header=None)
+def cache_prefix(digest: str) -> str:
+    return f"v{CACHE_VERSION}__{digest[:16]}__"
+
+
+# Sheets keep their workbook position in the name, so cached tables are tried in the order a scan would
+def cache_path(digest: str, position: int, sheet_name: str) -> str:
+    safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', sheet_name)
+    return os.path.join(CACHE_DIR, f"{cache_prefix(digest)}{position:03d}__{safe}.parquet")
+
+
+def read_all_sheets(path: str) -> Dict[str, pd.DataFrame]:
+    # One parse of the workbook for every sheet
+    return pd.read_excel(path, sheet_name=None, header=None)
+
+
+# Parquet needs one type per column; exports mix numbers, text and dates in a column
+def to_cacheable(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    for c in out.columns:
+        if out[c].dtype != object:
+            continue
+        kind = pd.api.types.infer_dtype(out[c], skipna=True)
+        if kind in ('datetime', 'datetime64', 'date'):
+            out[c] = pd.to_datetime(out[c], errors='coerce')
+        elif kind != 'string':
+            out[c] = out[c].map(lambda v: None if pd.isna(v) else str(v)).astype('string')
+    return out
+
+
+# Every cached details table of the workbook, in workbook order
+def load_cached_details(digest: str) -> List[Tuple[str, pd.DataFrame]]:
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    prefix = cache_prefix(digest)
+    out = []
+    for name in sorted(os.listdir(CACHE_DIR)):
+        if name.startswith(prefix) and name.endswith('.parquet'):
+            try:
+                df = pd.read_parquet(os.path.join(CACHE_DIR, name))
+            except Exception:
+                continue
+            out.append((df.attrs.get('sheet', name[len(prefix) + 5:-len('.parquet')]), df))
+    return out
+
+
+def save_cached_details(digest: str, tables: List[Tuple[int, str, pd.DataFrame]]) -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for position, sheet_name, df in tables:
+            out = to_cacheable(df)
+            out.attrs['sheet'] = sheet_name
+            out.to_parquet(cache_path(digest, position, sheet_name), index=False)
+    except Exception as e:
+        print(f"WARNING: Could not cache parsed sheet (is pyarrow installed?): {e}", file=sys.stderr)
 
 
 def build_df_from_header_row(df_raw: pd.DataFrame, header_row_idx: int) -> pd.DataFrame:
@@ -71,29 +129,30 @@ def build_df_from_header_row(df_raw: pd.DataFrame, header_row_idx: int) -> pd.Da
 
 
 def find_details_header_row(df_raw: pd.DataFrame) -> Optional[int]:
-    max_rows = min(200, len(df_raw))
-    for i in range(max_rows):
-        row_vals = [normalize_text(v) for v in df_raw.iloc[i].tolist()]
-        row_text = ' | '.join(row_vals)
-        if ('lease status' in row_text) and (('lease start' in row_text) or ('start date' in row_text)):
-            return i
-    return None
+    # Every non-empty cell of the first 200 rows, normalized in one vectorized pass
+    top = df_raw.head(200).reset_index(drop=True)
+    cells = top.stack()
+    if cells.empty:
+        return None
+    cells = cells.astype(str).str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+    by_row = cells.index.get_level_values(0)
+    has_status = cells.str.contains('lease status', regex=False).groupby(by_row).any()
+    has_start = (cells.str.contains('lease start', regex=False)
+                 | cells.str.contains('start date', regex=False)).groupby(by_row).any()
+    hits = has_status.index[has_status & has_start]
+    return int(hits[0]) if len(hits) else None
 
 
-def parse_events_from_details_table(xls: pd.ExcelFile, sheet_name: str) -> Optional[pd.DataFrame]:
-    try:
-        df_raw = read_sheet_header_none(xls, sheet_name)
-    except Exception:
-        return None
+def details_table(df_raw: pd.DataFrame) -> Optional[pd.DataFrame]:
     if df_raw is None or df_raw.empty:
         return None
-
     hdr_idx = find_details_header_row(df_raw)
     if hdr_idx is None:
         return None
+    return build_df_from_header_row(df_raw, hdr_idx)
 
-    df = build_df_from_header_row(df_raw, hdr_idx)
 
+def parse_events(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
     # Try to locate required columns
     status_col = pick_column(df, STATUS_CANDIDATES)
     date_col = pick_column(df, DATE_CANDIDATES)
@@ -102,131 +161,84 @@ def parse_events_from_details_table(xls: pd.ExcelFile, sheet_name: str) -> Optio
         return None
 
     # Coerce dates
-    df['_parsed_date'] = pd.to_datetime(df[date_col], errors='coerce')
+    df = df.copy()
+    df['_parsed_date'] = parse_dates(df[date_col])
     df = df.dropna(subset=['_parsed_date']).copy()
 
     # Keep only within range
-    df = df[(df['_parsed_date'] >= START_DATE) & (df['_parsed_date'] <= END_DATE)].copy()
+    df = df[(df['_parsed_date'] >= start) & (df['_parsed_date'] <= end)].copy()
     if df.empty:
         return None
 
-    return df[[status_col, '_parsed_date']].rename(columns={status_col: '_status'})
+    cols = [status_col, '_parsed_date'] + (['property'] if 'property' in df.columns else [])
+    return df[cols].rename(columns={status_col: '_status'})
+
+
+# (sheet, events) for the first sheet whose details table has events in the window. Every details table
+# found is cached, so later runs over the same export try the same sheets in the same order without the
+# Excel parse; when none of them has events in this window the workbook is scanned again.
+def load_events(path: str, start: pd.Timestamp, end: pd.Timestamp,
+                use_cache: bool = True) -> Tuple[Optional[str], Optional[pd.DataFrame], List[str]]:
+    digest = file_sha256(path)
+    for sheet, df in (load_cached_details(digest) if use_cache else []):
+        events = parse_events(df, start, end)
+        if events is not None:
+            return sheet, events, [sheet]
+    sheets = read_all_sheets(path)
+    tables = [(i, sheet, details_table(df_raw)) for i, (sheet, df_raw) in enumerate(sheets.items())]
+    tables = [t for t in tables if t[2] is not None]
+    if use_cache and tables:
+        save_cached_details(digest, tables)
+    for _, sheet, df in tables:
+        events = parse_events(df, start, end)
+        if events is not None:
+            return sheet, events, list(sheets)
+    return None, None, list(sheets)
 
 
-def classify_status(val: object) -> Tuple[bool, bool]:
-    s = normalize_text(val)
-    is_renewal = ('renew' in s) or ('renewal' in s)
-    is_new = (not is_renewal) and (('new' in s) or ('lease - new' in s) or ('new lease' in s))
-    # Exclusions
-    excluded_tokens = ['cancel', 'declin', 'notice', 'denied', 'withdraw', 'transfer pending']
-    if any(tok in s for tok in excluded_tokens):
-        return False, False
-    return is_renewal, is_new
+def monthly_from_events(df_events: pd.DataFrame) -> pd.DataFrame:
+    is_renewal, is_new = classify_statuses(df_events['_status'], 'loose')
+    return property_monthly(df_events['_parsed_date'], is_renewal, is_new, df_events.get('property'))
 
 
-def monthly_from_events(df_events: pd.DataFrame) -> pd.DataFrame:
-    flags = df_events['_status'].apply(classify_status).tolist()
-    df_events['_is_renewal'] = [r for r, _ in flags]
-    df_events['_is_new'] = [n for _, n in flags]
-    df_events['_is_counted'] = df_events['_is_renewal'] | df_events['_is_new']
-    df_events['_month'] = df_events['_parsed_date'].values.astype('datetime64[M]')
-
-    all_months = pd.date_range(START_DATE, END_DATE, freq='MS')
-    g = df_events[df_events['_is_counted']].groupby('_month')
-    monthly = pd.DataFrame({
-        'renewal_added': g['_is_renewal'].sum().astype(int),
-        'total_added': g['_is_counted'].sum().astype(int),
-    })
-    monthly = monthly.reindex(all_months, fill_value=0)
-    return monthly
-
-
-def write_outputs(summary: pd.DataFrame) -> None:
-    try:
-        summary.to_csv(OUTPUT_CSV, index=False)
-    except Exception as e:
-        print(f"ERROR: Failed to write CSV: {e}", file=sys.stderr)
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Monthly prelease / renewal summary from a Pre-Lease workbook.')
+    p.add_argument('input', nargs='?', default=FILE_PATH)
+    add_common_args(p, OUTPUT_CSV, OUTPUT_XLSX)
+    p.add_argument('--no-cache', action='store_true', help='Re-parse the workbook even if a cached table exists')
+    args = p.parse_args(argv)
+    args.window = args.window or [default_window()]
+    return args
 
-    wrote_chart = False
-    try:
-        with pd.ExcelWriter(OUTPUT_XLSX, engine='xlsxwriter') as writer:
-            summary.to_excel(writer, sheet_name='Summary', index=False)
-            workbook  = writer.book
-            worksheet = writer.sheets['Summary']
-            chart = workbook.add_chart({'type': 'line'})
-            last_row = len(summary) + 1
-            chart.add_series({
-                'name':       'Renewal %',
-                'categories': ['Summary', 1, 0, last_row-1, 0],
-                'values':     ['Summary', 1, 2, last_row-1, 2],
-                'line':       {'color': '#1f77b4'},
-            })
-            chart.add_series({
-                'name':       'Prelease%',
-                'categories': ['Summary', 1, 0, last_row-1, 0],
-                'values':     ['Summary', 1, 3, last_row-1, 3],
-                'line':       {'color': '#ff7f0e'},
-            })
-            chart.set_title({'name': 'Prelease vs Renewal % (Aug 2024 - Aug 2025)'})
-            chart.set_x_axis({'name': 'Month'})
-            chart.set_y_axis({'name': 'Percent', 'major_gridlines': {'visible': True}})
-            chart.set_legend({'position': 'bottom'})
-            worksheet.insert_chart('F2', chart, {'x_scale': 1.3, 'y_scale': 1.3})
-            wrote_chart = True
-    except Exception:
-        try:
-            with pd.ExcelWriter(OUTPUT_XLSX, engine='openpyxl') as writer:
-                summary.to_excel(writer, sheet_name='Summary', index=False)
-        except Exception as e2:
-            print(f"ERROR: Failed to write Excel: {e2}", file=sys.stderr)
-    print(f"\nOutput CSV: {OUTPUT_CSV}")
-    print(f"Output Excel: {OUTPUT_XLSX}{' (with chart)' if wrote_chart else ''}")
-
-
-def main():
-    if not os.path.exists(FILE_PATH):
-        print(f"ERROR: File not found: {FILE_PATH}", file=sys.stderr)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.input):
+        print(f"ERROR: File not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
+    # One parse and one (property, month) groupby cover every requested window and property
+    start, end = span(args.window)
     try:
-        xls = pd.ExcelFile(FILE_PATH)
+        chosen_sheet, chosen_df, sheet_names = load_events(args.input, start, end, not args.no_cache)
     except Exception as e:
         print(f"ERROR: Failed to open Excel file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Prefer sheet that contains a details table with Lease Status + Lease Start
-    chosen_df = None
-    chosen_sheet = None
-    for sheet in xls.sheet_names:
-        df_events = parse_events_from_details_table(xls, sheet)
-        if df_events is not None:
-            chosen_df = df_events
-            chosen_sheet = sheet
-            break
-
     if chosen_df is None:
         print("ERROR: Could not detect the detailed table with Lease Status and Lease Start.", file=sys.stderr)
-        print("Sheets found:", xls.sheet_names, file=sys.stderr)
+        print("Sheets found:", sheet_names, file=sys.stderr)
         sys.exit(1)
 
+    chosen_df = filter_property(chosen_df, args.property)
     monthly = monthly_from_events(chosen_df)
-
-    # Rolling totals
-    monthly['renewal_cum'] = monthly['renewal_added'].cumsum()
-    monthly['total_cum'] = monthly['total_added'].cumsum()
-
-    summary = pd.DataFrame({
-        'Month': [d.strftime('%b %Y') for d in monthly.index.to_pydatetime()],
-        'Renewal Leases': monthly['renewal_cum'].astype(int).values,
-        'Renewal %': (monthly['renewal_cum'] / BEDS * 100.0).round(2).values,
-        'Prelease%': (monthly['total_cum'] / BEDS * 100.0).round(2).values,
-    })
+    beds = resolve_beds(list(monthly.index.get_level_values('property').unique()), known_beds(args), args.beds)
+    summaries = summarize(monthly, args.window, beds)
 
     print(f"Processed sheet: {chosen_sheet}")
-    print('\nSummary (Aug 2024 - Aug 2025)')
-    print(summary.to_string(index=False))
+    print_summaries(summaries, args.window)
 
-    write_outputs(summary)
+    write_outputs(summaries, args.window, args.output_csv, args.output_xlsx)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,6 @@
+import argparse
 import os
 import sys
-import re
 import json
 from typing import Optional, List, Tuple
 
@@ -10,13 +10,19 @@ except ModuleNotFoundError:
     print("ERROR: pandas is not installed. Run: python -m pip install pandas openpyxl xlsxwriter", file=sys.stderr)
     sys.exit(1)
 
+from csv_ingest import CHUNK_ROWS, header_frame, iter_columns
+from date_parse import parse_dates
+from lease_status import classify_statuses
+from prelease_state import (LEASE_KEY_COLUMNS, STATE_PATH, PreleaseState, counted_leases, lease_ids,
+                            unique_leases)
+from prelease_engine import (PORTFOLIO, add_common_args, default_window, filter_property, known_beds,
+                             print_summaries, property_monthly, resolve_beds, rollup, span, summary_frames,
+                             window_monthly, write_outputs)
+
 CSV_PATH = r"c:\\Users\\brian\\Downloads\\Aberrant\\Pre-Lease - Details.csv"
 OUTPUT_CSV = r"c:\\Users\\brian\\Downloads\\Aberrant\\Prelease_Summary_Aug2024_Aug2025.csv"
 OUTPUT_XLSX = r"c:\\Users\\brian\\Downloads\\Aberrant\\Prelease_Summary_Aug2024_Aug2025.xlsx"
 OUTPUT_JS = r"c:\\Users\\brian\\Downloads\\Aberrant\\prelease_data.js"
-START_DATE = pd.Timestamp('2024-08-01')
-END_DATE = pd.Timestamp('2025-08-31 23:59:59')
-BEDS = 571
 
 # Exact preferred names first, then looser fallbacks
 DATE_PREFS_EXACT = [
@@ -32,15 +38,6 @@ STATUS_CANDIDATES = [
 ]
 
 
-def normalize_text(s: object) -> str:
-    s = "" if pd.isna(s) else str(s)
-    return re.sub(r"\s+", " ", s).strip().lower()
-
-
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    return df.rename(columns={c: normalize_text(c) for c in df.columns})
-
-
 def pick_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
     cols = set(df.columns)
     for cand in candidates:
@@ -65,147 +62,166 @@ def choose_date_column(df: pd.DataFrame) -> Tuple[str, pd.Series]:
     raise KeyError('No suitable date column found')
 
 
-def classify_status_strict(val: object) -> Tuple[bool, bool]:
-    """
-    Strict classification per user spec:
-      - New lease counted ONLY if Lease Status is 'Lease Approved' (case-insensitive), i.e., contains 'lease' and 'approved' and NOT 'renewal'.
-      - Renewal counted ONLY if Lease Status is 'Renewal Lease Approved' (contains 'renewal', 'lease', 'approved').
-      - Everything else excluded from prelease counts.
-    """
-    s = normalize_text(val)
-    excluded_tokens = ['cancel', 'declin', 'notice', 'denied', 'withdraw', 'transfer pending']
-    if any(tok in s for tok in excluded_tokens):
-        return False, False
-
-    has_lease = 'lease' in s
-    has_approved = 'approved' in s
-    has_renewal = 'renewal' in s
-
-    is_renewal_approved = has_lease and has_approved and has_renewal
-    is_new_approved = has_lease and has_approved and (not has_renewal)
-
-    return is_renewal_approved, is_new_approved
-
-
-def main():
-    if not os.path.exists(CSV_PATH):
-        print(f"ERROR: File not found: {CSV_PATH}", file=sys.stderr)
+# Running totals for one choice of signed-date column, added to as each chunk arrives: (property, month)
+# counts inside the windows, the counted leases when a state store is kept, and the dates seen
+class SignedTotals:
+    def __init__(self, column: str, keep_leases: bool):
+        self.column = column
+        self.keep_leases = keep_leases
+        self.dated = self.in_range = 0
+        self.first = self.last = None
+        self.monthly: List[pd.DataFrame] = []
+        self.leases: List[pd.DataFrame] = []
+
+    def add(self, chunk: pd.DataFrame, is_renewal: pd.Series, is_new: pd.Series, start, end) -> None:
+        signed = parse_dates(chunk[self.column])
+        dated = signed.dropna()
+        if len(dated):
+            self.dated += len(dated)
+            self.first = dated.min() if self.first is None else min(self.first, dated.min())
+            self.last = dated.max() if self.last is None else max(self.last, dated.max())
+        in_range = (signed >= start) & (signed <= end)
+        self.in_range += int(in_range.sum())
+        pm = property_monthly(signed.where(in_range), is_renewal, is_new, chunk.get('property'))
+        if len(pm) or not self.monthly:
+            self.monthly.append(pm)
+        if self.keep_leases:
+            # The store keeps every month, so the whole export is diffed, not just the windows
+            self.leases.append(counted_leases(lease_ids(chunk, chunk.get('property')), signed, is_renewal, is_new,
+                                              chunk.get('property')))
+
+    def property_monthly(self) -> pd.DataFrame:
+        return pd.concat(self.monthly).groupby(level=['property', 'month']).sum()
+
+    def counted_leases(self) -> pd.DataFrame:
+        return unique_leases(pd.concat(self.leases))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Monthly prelease / renewal summary from a Pre-Lease Details CSV export.')
+    p.add_argument('input', nargs='?', default=CSV_PATH)
+    add_common_args(p, OUTPUT_CSV, OUTPUT_XLSX)
+    p.add_argument('--output-js', default=OUTPUT_JS, help='prelease_data.js for prelease_visual.html (first window)')
+    p.add_argument('--state', nargs='?', const=STATE_PATH,
+                   help=f"Incremental mode: diff this export into the state store (default: {STATE_PATH}) and "
+                        f"summarize from its counters")
+    p.add_argument('--as-of', help='Date the export was pulled, for the state history (default: today)')
+    p.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per read chunk')
+    args = p.parse_args(argv)
+    args.window = args.window or [default_window()]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.input):
+        print(f"ERROR: File not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
+    # Header only: pick columns before reading any data
     try:
-        df = pd.read_csv(CSV_PATH, dtype=str, low_memory=False)
+        cols = header_frame(args.input)
     except Exception as e:
         print(f"ERROR: Failed to read CSV: {e}", file=sys.stderr)
         sys.exit(1)
 
-    if df is None or df.empty:
-        print("ERROR: CSV is empty.", file=sys.stderr)
-        sys.exit(1)
-
-    df = normalize_columns(df)
-
-    status_col = pick_column(df, STATUS_CANDIDATES)
+    status_col = pick_column(cols, STATUS_CANDIDATES)
     if not status_col:
         print("ERROR: Could not find a status column (e.g., 'Lease Status').", file=sys.stderr)
-        print("Available columns:", list(df.columns), file=sys.stderr)
+        print("Available columns:", list(cols.columns), file=sys.stderr)
         sys.exit(1)
 
     try:
-        date_col_name, date_series = choose_date_column(df)
+        date_col_name, _ = choose_date_column(cols)
     except KeyError:
         print("ERROR: Could not find a date column (e.g., 'Lease - Approved').", file=sys.stderr)
-        print("Available columns:", list(df.columns), file=sys.stderr)
-        sys.exit(1)
-
-    signed_date = None
-    if 'lease - approved' in df.columns:
-        signed_date = df['lease - approved']
-    if signed_date is None or pd.isna(signed_date).all():
-        if 'lease - completed' in df.columns:
-            signed_date = df['lease - completed']
-    if signed_date is None:
-        signed_date = date_series
-
-    df['_parsed_date'] = pd.to_datetime(signed_date, errors='coerce')
-    df = df.dropna(subset=['_parsed_date']).copy()
-
-    df = df[(df['_parsed_date'] >= START_DATE) & (df['_parsed_date'] <= END_DATE)].copy()
-    if df.empty:
-        print(f"ERROR: No records within range {START_DATE.date()} to {END_DATE.date()}.", file=sys.stderr)
-        all_dates = pd.to_datetime(signed_date, errors='coerce').dropna()
-        if not all_dates.empty:
-            print(f"Date range in file: {all_dates.min().date()} .. {all_dates.max().date()}", file=sys.stderr)
+        print("Available columns:", list(cols.columns), file=sys.stderr)
         sys.exit(1)
 
-    flags = df[status_col].apply(classify_status_strict).tolist()
-    df['_is_renewal'] = [r for r, _ in flags]
-    df['_is_new'] = [n for _, n in flags]
-    df['_is_counted'] = df['_is_renewal'] | df['_is_new']
-
-    df['_month'] = df['_parsed_date'].values.astype('datetime64[M]')
-
-    g = df[df['_is_counted']].groupby('_month')
-    monthly = pd.DataFrame({
-        'renewal_added': g['_is_renewal'].sum().astype(int),
-        'new_added': g['_is_new'].sum().astype(int),
-    })
-    monthly['total_added'] = monthly['renewal_added'] + monthly['new_added']
-
-    all_months = pd.date_range(START_DATE, END_DATE, freq='MS')
-    monthly = monthly.reindex(all_months, fill_value=0)
-
-    monthly['renewal_cum'] = monthly['renewal_added'].cumsum()
-    monthly['total_cum'] = monthly['total_added'].cumsum()
-
-    summary = pd.DataFrame({
-        'Month': [d.strftime('%b %Y') for d in monthly.index.to_pydatetime()],
-        'Renewal Leases': monthly['renewal_cum'].astype(int).values,
-        'Renewal %': (monthly['renewal_cum'] / BEDS * 100.0).round(2).values,
-        'Prelease%': (monthly['total_cum'] / BEDS * 100.0).round(2).values,
-    })
-
+    filter_property(cols, args.property)  # warns once when there is no property column to filter on
+
+    # Signed date: 'lease - approved', or 'lease - completed' when the approved column is blank throughout.
+    # With both present that is only known once the file is read, so both are totalled until then.
+    if 'lease - approved' in cols.columns:
+        signed_cols = ['lease - approved'] + (['lease - completed'] if 'lease - completed' in cols.columns else [])
+    elif 'lease - completed' in cols.columns:
+        signed_cols = ['lease - completed']
+    else:
+        signed_cols = [date_col_name]
+
+    # Only the columns used below are read, and each chunk is filtered to the property, classified and
+    # reduced to counts as it arrives; no rows accumulate. Lease id columns stay raw strings so ids match
+    # what the state store already holds.
+    start, end = span(args.window)
+    totals = [SignedTotals(c, bool(args.state)) for c in signed_cols]
+    rows = 0
+    date_cols = list(dict.fromkeys(DATE_PREFS_EXACT + [date_col_name]))
     try:
-        summary.to_csv(OUTPUT_CSV, index=False)
+        for chunk in iter_columns(args.input, [status_col, 'property'] + date_cols + LEASE_KEY_COLUMNS,
+                                  dates=[c for c in date_cols if c not in LEASE_KEY_COLUMNS],
+                                  categories=[status_col, 'property'], chunksize=args.chunk_rows):
+            if 'property' in chunk:
+                chunk = filter_property(chunk, args.property)
+            rows += len(chunk)
+            # Strict: only 'Lease Approved' / 'Renewal Lease Approved' count (see lease_status)
+            is_renewal, is_new = classify_statuses(chunk[status_col], 'strict')
+            for t in totals:
+                t.add(chunk, is_renewal, is_new, start, end)
+    except KeyError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
-        print(f"ERROR: Failed to write CSV: {e}", file=sys.stderr)
+        print(f"ERROR: Failed to read CSV: {e}", file=sys.stderr)
+        sys.exit(1)
 
-    wrote_chart = False
-    try:
-        with pd.ExcelWriter(OUTPUT_XLSX, engine='xlsxwriter') as writer:
-            summary.to_excel(writer, sheet_name='Summary', index=False)
-            workbook = writer.book
-            worksheet = writer.sheets['Summary']
-            chart = workbook.add_chart({'type': 'line'})
-            last_row = len(summary) + 1
-            chart.add_series({'name': 'Renewal %', 'categories': ['Summary', 1, 0, last_row-1, 0], 'values': ['Summary', 1, 2, last_row-1, 2], 'line': {'color': '#1f77b4'}})
-            chart.add_series({'name': 'Prelease%', 'categories': ['Summary', 1, 0, last_row-1, 0], 'values': ['Summary', 1, 3, last_row-1, 3], 'line': {'color': '#ff7f0e'}})
-            chart.set_title({'name': 'Prelease vs Renewal % (Aug 2024 - Aug 2025)'})
-            chart.set_x_axis({'name': 'Month'})
-            chart.set_y_axis({'name': 'Percent', 'major_gridlines': {'visible': True}})
-            chart.set_legend({'position': 'bottom'})
-            worksheet.insert_chart('F2', chart, {'x_scale': 1.3, 'y_scale': 1.3})
-            wrote_chart = True
-    except Exception:
-        try:
-            with pd.ExcelWriter(OUTPUT_XLSX, engine='openpyxl') as writer:
-                summary.to_excel(writer, sheet_name='Summary', index=False)
-        except Exception as e2:
-            print(f"ERROR: Failed to write Excel: {e2}", file=sys.stderr)
+    if not rows:
+        print(f"ERROR: No rows for property {args.property!r}." if args.property else "ERROR: CSV is empty.",
+              file=sys.stderr)
+        sys.exit(1)
+    signed = totals[1] if len(totals) > 1 and not totals[0].dated else totals[0]
 
-    # Write JS data
-    labels = [d.strftime('%b %Y') for d in monthly.index.to_pydatetime()]
-    renewal_leases = monthly['renewal_cum'].astype(int).tolist()
-    renewal_pct = (monthly['renewal_cum'] / BEDS * 100.0).round(2).tolist()
-    prelease_pct = (monthly['total_cum'] / BEDS * 100.0).round(2).tolist()
+    state = None
+    if args.state:
+        state = PreleaseState(args.state)
+        try:
+            stats = state.apply(signed.counted_leases(), args.as_of, os.path.basename(args.input), args.property)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"State {args.state}: {stats['added']} added, {stats['changed']} changed, "
+              f"{stats['removed']} removed ({stats['cells']} property-months updated)")
+
+    if not signed.in_range and state is None:
+        print(f"ERROR: No records within range {start.date()} to {end.date()}.", file=sys.stderr)
+        if signed.dated:
+            print(f"Date range in file: {signed.first.date()} .. {signed.last.date()}", file=sys.stderr)
+        sys.exit(1)
 
+    # Every window and property is a slice of the same (property, month) counts
+    if state is not None:
+        pm = state.property_monthly(args.property)
+        state.close()
+    else:
+        pm = signed.property_monthly()
+    props = list(pm.index.get_level_values('property').unique())
+    monthly_by_prop, beds = rollup(pm, resolve_beds(props, known_beds(args), args.beds))
+    summaries = summary_frames(monthly_by_prop, args.window, beds)
+    write_outputs(summaries, args.window, args.output_csv, args.output_xlsx)
+
+    # Write JS data: first window, for the portfolio when there are several properties. The diagnostics use
+    # the same rolled-up monthly frame as the summary, so both count the same properties
+    first = args.window[0]
+    prop = PORTFOLIO if (PORTFOLIO, first.name) in summaries else next(p for p, _ in summaries)
+    monthly = window_monthly(monthly_by_prop[prop], first)
+    summary = summaries[(prop, first.name)]
     try:
-        with open(OUTPUT_JS, 'w', encoding='utf-8') as f:
+        with open(args.output_js, 'w', encoding='utf-8') as f:
             f.write('// Auto-generated by analyze_prelease_csv.py\n')
             f.write('window.preleaseData = ' + json.dumps({
-                'labels': labels,
-                'renewalLeases': renewal_leases,
-                'renewalPct': renewal_pct,
-                'preleasePct': prelease_pct,
+                'labels': summary['Month'].tolist(),
+                'renewalLeases': summary['Renewal Leases'].tolist(),
+                'renewalPct': summary['Renewal %'].tolist(),
+                'preleasePct': summary['Prelease%'].tolist(),
             }) + ';\n')
     except Exception as e:
         print(f"ERROR: Failed to write JS data file: {e}", file=sys.stderr)
@@ -218,11 +234,8 @@ def main():
     print("\nRaw monthly additions (strict approved-only):")
     print(diag.to_string())
 
-    print("\nSummary (Aug 2024 - Aug 2025):")
-    print(summary.to_string(index=False))
-    print(f"\nOutput CSV: {OUTPUT_CSV}")
-    print(f"Output Excel: {OUTPUT_XLSX}{' (with chart)' if wrote_chart else ''}")
-    print(f"JS data for HTML: {OUTPUT_JS}")
+    print_summaries(summaries, args.window, ':')
+    print(f"JS data for HTML: {args.output_js}")
 
 
 if __name__ == '__main__':
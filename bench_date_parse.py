@@ -0,0 +1,53 @@
+import argparse
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from date_parse import parse_dates
+
+# Columns shaped like the exports: a few years of MM/DD/YYYY dates, mostly repeated, some blank
+COLUMNS = {'Created On': 0.0, 'Lease - Approved': 0.7, 'Lease Start': 0.3}
+
+
+def synthetic_export(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2022-01-01', '2025-12-31', freq='D').strftime('%m/%d/%Y').to_numpy(dtype=object)
+    out = {}
+    for name, blank_share in COLUMNS.items():
+        col = days[rng.integers(0, len(days), rows)]
+        col[rng.random(rows) < blank_share] = None
+        out[name] = col
+    return pd.DataFrame(out)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Time date parsing on a synthetic export: inferred vs parse_dates.')
+    p.add_argument('--rows', type=int, default=1_000_000)
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args(argv)
+
+    df = synthetic_export(args.rows)
+    print(f"{args.rows:,} rows, {len(df.columns)} date columns")
+    print(f"{'Column':<20} {'to_datetime':>12} {'parse_dates':>12} {'Speedup':>8}")
+    for name in df.columns:
+        col = df[name]
+        base = timed(lambda: pd.to_datetime(col, errors='coerce'), args.repeat)
+        fast = timed(lambda: parse_dates(col), args.repeat)
+        if not pd.to_datetime(col, errors='coerce').equals(parse_dates(col)):
+            print(f"WARNING: {name}: results differ")
+        print(f"{name:<20} {base:>11.3f}s {fast:>11.3f}s {base / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,55 +1,223 @@
+import argparse
+import csv
+import html
+import json
+import os
+import sys
+from typing import List, Optional, Tuple
+
 import folium
-import openpyxl
+import numpy as np
+from branca.element import MacroElement
+from folium.plugins import FastMarkerCluster
+from jinja2 import Template
+
+from geo_distance import DIST_HEADER, UNIVERSITY_COORDS, haversine_np, to_float_array
+from sheet_io import read_sheet
 
-EXCEL_PATH = 'Bothell_with_distances.xlsx'
+INPUT_PATH = 'Bothell_with_distances.csv'
 MAP_PATH = 'bothell_folium_map.html'
 
-UNIVERSITY_COORDS = (47.758284, -122.191377)
 UNIVERSITY_ADDR = 'University of Bothell'  # Will show in popup
 RADIUS_MI = 10
 
-# Read data from Excel
-wb = openpyxl.load_workbook(EXCEL_PATH)
-ws = wb.active
-headers = [cell.value for cell in ws[1]]
-hdr_idx = {header: i for i, header in enumerate(headers)}
-
-# Prepare the map
-folium_map = folium.Map(location=UNIVERSITY_COORDS, zoom_start=10, tiles='OpenStreetMap')
-
-# University marker and radius
-folium.Marker(
-    UNIVERSITY_COORDS,
-    popup=f"<b>{UNIVERSITY_ADDR}</b><br>18612 Beardslee Blvd, Bothell, WA",
-    icon=folium.Icon(color='blue', icon='university', prefix='fa')
-).add_to(folium_map)
-
-folium.Circle(
-    location=UNIVERSITY_COORDS,
-    radius=RADIUS_MI * 1609.34,
-    color="#1c75bc",
-    fill=True,
-    fill_opacity=0.18
-).add_to(folium_map)
-
-# Plot each address
-for row in ws.iter_rows(min_row=2, values_only=True):
-    lat = row[hdr_idx.get('Latitude')]
-    lon = row[hdr_idx.get('Longitude')]
-    dist = row[hdr_idx.get('Distance to Univ (mi)')]
-    if lat is None or lon is None:
-        continue
-    addr = ', '.join(str(row[hdr_idx.get(h)]) for h in ['Street 1','Street 2','City','State','ZipCode'] if row[hdr_idx.get(h)])
-    color = 'green' if dist is not None and float(dist) <= RADIUS_MI else 'red'
-    folium.CircleMarker(
-        location=(lat, lon),
-        radius=5,
-        color=color,
+MODES = ('cluster', 'grid', 'markers')
+LABEL_HEADERS = ['Street 1', 'Street 2', 'Street Line1', 'Street Line2', 'City', 'State', 'State/Province',
+                 'ZipCode', 'Postal Code']
+# (min zoom, cell size in degrees): coarser bins when zoomed out
+GRID_LEVELS = [(0, 1.0), (8, 0.25), (10, 0.05), (12, 0.01)]
+
+# Leaflet callback for FastMarkerCluster: rows are [lat, lon, dist, label] and the popup HTML is
+# only built when a marker is opened
+CLUSTER_CALLBACK = """
+function (row) {
+    var color = row[2] !== null && row[2] <= %(radius)s ? 'green' : 'red';
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+        {radius: 5, color: color, fill: true, fillColor: color, fillOpacity: 0.85});
+    marker.bindPopup(function () { return '<b>' + row[3] + '</b><br>Dist: ' + row[2] + ' mi'; });
+    return marker;
+}
+"""
+
+
+# Shows exactly one of the grid layers, picked by the current zoom
+class ZoomLevels(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function () {
+            var map = {{ this._parent.get_name() }};
+            var levels = [{% for zoom, layer in this.levels %}[{{ zoom }}, {{ layer.get_name() }}]{{ ", " if not loop.last }}{% endfor %}];
+            function show() {
+                var z = map.getZoom(), pick = levels[0][1];
+                levels.forEach(function (l) { if (z >= l[0]) pick = l[1]; });
+                levels.forEach(function (l) { if (l[1] === pick) map.addLayer(l[1]); else map.removeLayer(l[1]); });
+            }
+            map.on('zoomend', show);
+            show();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, levels: List[Tuple[int, folium.map.Layer]]):
+        super().__init__()
+        self._name = 'ZoomLevels'
+        self.levels = levels
+
+
+# Latitude/Longitude/distance/label columns from geocoded .xlsx or .csv outputs, rows without coordinates dropped
+def load_points(paths: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    lat: List = []
+    lon: List = []
+    dist: List = []
+    labels: List[str] = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Skipping {path}: not found", file=sys.stderr)
+            continue
+        if path.lower().endswith('.csv'):
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                headers = next(reader)
+                rows = list(reader)
+        else:
+            _, _, headers, _, rows = read_sheet(path, [])
+        if 'Latitude' not in headers:
+            print(f"Skipping {path}: no Latitude column", file=sys.stderr)
+            continue
+        # First occurrence wins (older converters duplicated the Latitude/Longitude block)
+        lat_i, lon_i = headers.index('Latitude'), headers.index('Longitude')
+        dist_i = headers.index(DIST_HEADER) if DIST_HEADER in headers else None
+        label_i = [headers.index(h) for h in LABEL_HEADERS if h in headers]
+        for row in rows:
+            cell = lambda j: row[j] if j is not None and j < len(row) else None
+            lat.append(cell(lat_i))
+            lon.append(cell(lon_i))
+            dist.append(cell(dist_i))
+            labels.append(', '.join(str(cell(j)) for j in label_i if cell(j)))
+    lat, lon, dist = to_float_array(lat), to_float_array(lon), to_float_array(dist)
+    missing = np.isnan(dist)
+    dist[missing] = haversine_np(lat[missing], lon[missing], *UNIVERSITY_COORDS)
+    keep = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+    return lat[keep], lon[keep], np.round(dist[keep], 2), [labels[i] for i in keep]
+
+
+# Count points per cell_deg x cell_deg cell: (mean lat, mean lon, count, count within RADIUS_MI) per occupied cell
+def grid_bins(lat: np.ndarray, lon: np.ndarray, dist: np.ndarray, cell_deg: float):
+    ci = np.floor((lat + 90) / cell_deg).astype(np.int64)
+    cj = np.floor((lon + 180) / cell_deg).astype(np.int64)
+    ncols = int(np.ceil(360 / cell_deg)) + 1
+    _, inverse, counts = np.unique(ci * ncols + cj, return_inverse=True, return_counts=True)
+    c_lat = np.bincount(inverse, weights=lat) / counts
+    c_lon = np.bincount(inverse, weights=lon) / counts
+    near = np.bincount(inverse, weights=(dist <= RADIUS_MI).astype(np.float64)).astype(np.int64)
+    return c_lat, c_lon, counts, near
+
+
+def add_markers(folium_map: folium.Map, lat, lon, dist, labels) -> None:
+    for la, lo, d, addr in zip(lat, lon, dist, labels):
+        color = 'green' if d <= RADIUS_MI else 'red'
+        folium.CircleMarker(
+            location=(float(la), float(lo)),
+            radius=5,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.85,
+            popup=f"<b>{addr}</b><br>Dist: {d} mi"
+        ).add_to(folium_map)
+
+
+def add_cluster(folium_map: folium.Map, lat, lon, dist, labels) -> None:
+    data = [[round(float(la), 5), round(float(lo), 5), None if np.isnan(d) else float(d), html.escape(addr)]
+            for la, lo, d, addr in zip(lat, lon, dist, labels)]
+    FastMarkerCluster(data, callback=CLUSTER_CALLBACK % {'radius': RADIUS_MI}, name='Prospects').add_to(folium_map)
+
+
+# One GeoJSON layer of aggregated cells per zoom band; a single popup template serves every cell
+def add_grid(folium_map: folium.Map, lat, lon, dist, labels) -> None:
+    levels = []
+    for zoom, cell_deg in GRID_LEVELS:
+        c_lat, c_lon, counts, near = grid_bins(lat, lon, dist, cell_deg)
+        features = [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(float(x), 5), round(float(y), 5)]},
+            'properties': {'count': int(n), 'near': int(k)},
+        } for x, y, n, k in zip(c_lon, c_lat, counts, near)]
+        layer = folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name=f"{cell_deg} deg grid",
+            marker=folium.CircleMarker(fill=True, fill_opacity=0.6, weight=1),
+            style_function=lambda f: {
+                'radius': 4 + 3 * f['properties']['count'] ** 0.5,
+                'color': 'green' if f['properties']['near'] * 2 >= f['properties']['count'] else 'red',
+            },
+            popup=folium.GeoJsonPopup(fields=['count', 'near'],
+                                      aliases=['Prospects', f"Within {RADIUS_MI} mi"]),
+            control=False,
+        ).add_to(folium_map)
+        levels.append((zoom, layer))
+    ZoomLevels(levels).add_to(folium_map)
+
+
+# Overlay of density_grid.py's tiles, as its index.json lists them: the tile path and zoom range come from
+# the index, and the URL is relative to the map file so it resolves wherever the HTML is written
+def density_layer(density_dir: str, output: str) -> folium.TileLayer:
+    index_path = os.path.join(density_dir, 'index.json')
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Cannot read {index_path} (run density_grid.py first): {e}", file=sys.stderr)
+        sys.exit(1)
+    zooms = [int(z) for z, level in index.get('levels', {}).items() if 'tiles' in level]
+    if not index.get('tiles') or not zooms:
+        print(f"ERROR: {index_path} lists no PNG tiles (run density_grid.py with --format png)", file=sys.stderr)
+        sys.exit(1)
+    url = os.path.relpath(os.path.join(density_dir, index['tiles']), os.path.dirname(os.path.abspath(output)))
+    return folium.TileLayer(tiles=url.replace(os.sep, '/'), attr='Prospect density', name='Prospect density',
+                            overlay=True, show=False, min_native_zoom=min(zooms), max_native_zoom=max(zooms),
+                            opacity=0.8)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Folium map of geocoded prospects around the university.')
+    p.add_argument('inputs', nargs='*', default=[INPUT_PATH], help='Geocoded .csv/.xlsx outputs to combine')
+    p.add_argument('-o', '--output', default=MAP_PATH)
+    p.add_argument('--density', metavar='DIR', help='Overlay the density tiles written by density_grid.py to DIR')
+    p.add_argument('--mode', choices=MODES, default='cluster',
+                   help='cluster: client-side clustering over a compact array; grid: counts pre-aggregated per '
+                        'zoom level; markers: one inline marker per row (largest file)')
+    args = p.parse_args(argv)
+
+    lat, lon, dist, labels = load_points(args.inputs)
+
+    # Prepare the map
+    folium_map = folium.Map(location=UNIVERSITY_COORDS, zoom_start=10, tiles='OpenStreetMap')
+
+    # University marker and radius
+    folium.Marker(
+        UNIVERSITY_COORDS,
+        popup=f"<b>{UNIVERSITY_ADDR}</b><br>18612 Beardslee Blvd, Bothell, WA",
+        icon=folium.Icon(color='blue', icon='university', prefix='fa')
+    ).add_to(folium_map)
+
+    folium.Circle(
+        location=UNIVERSITY_COORDS,
+        radius=RADIUS_MI * 1609.34,
+        color="#1c75bc",
         fill=True,
-        fill_color=color,
-        fill_opacity=0.85,
-        popup=f"<b>{addr}</b><br>Dist: {dist} mi"
+        fill_opacity=0.18
     ).add_to(folium_map)
 
-folium_map.save(MAP_PATH)
-print(f"Wrote: {MAP_PATH}")
+    {'cluster': add_cluster, 'grid': add_grid, 'markers': add_markers}[args.mode](folium_map, lat, lon, dist, labels)
+
+    if args.density:
+        density_layer(args.density, args.output).add_to(folium_map)
+        folium.LayerControl().add_to(folium_map)
+
+    folium_map.save(args.output)
+    print(f"Wrote: {args.output} ({len(lat)} points, {args.mode}, {os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from date_parse import parse_dates
+
+CHUNK_ROWS = 250_000
+
+
+def normalize_name(s: object) -> str:
+    s = "" if pd.isna(s) else str(s)
+    return re.sub(r"\s+", " ", s).strip().lower()
+
+
+# Normalized column name -> name as written in the file (first occurrence wins), from the header line only
+def header_map(path: str) -> Dict[str, str]:
+    names: Dict[str, str] = {}
+    for c in pd.read_csv(path, nrows=0).columns:
+        names.setdefault(normalize_name(c), c)
+    return names
+
+
+# Zero-row frame with the normalized header, so the analyzers' pick_column helpers can choose columns
+# before any data is read
+def header_frame(path: str) -> pd.DataFrame:
+    return pd.DataFrame(columns=list(header_map(path)))
+
+
+# Read only `columns` (normalized names; absent ones are skipped) as strings, in chunks of `chunksize` rows.
+# Each chunk comes back with normalized names, `dates` parsed (with date_format, else a detected format)
+# and `categories` as categoricals with blanks ''
+def iter_columns(path: str, columns: Iterable[str], dates: Iterable[str] = (), categories: Iterable[str] = (),
+                 chunksize: int = CHUNK_ROWS, date_format: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    header = header_map(path)
+    wanted = [c for c in dict.fromkeys(columns) if c in header]
+    rename = {header[c]: c for c in wanted}
+    reader = pd.read_csv(path, usecols=list(rename), dtype=str, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)[wanted]
+        for c in dates:
+            if c in chunk.columns:
+                chunk[c] = parse_dates(chunk[c], date_format)
+        for c in categories:
+            if c in chunk.columns:
+                chunk[c] = chunk[c].fillna('').astype('category')
+        yield chunk
+
+
+# Stack chunks, merging categoricals so they stay categorical (plain concat falls back to object)
+def concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    if not chunks:
+        return pd.DataFrame()
+    out = pd.concat(chunks, ignore_index=True)
+    for c in chunks[0].columns:
+        if isinstance(chunks[0][c].dtype, pd.CategoricalDtype) and not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = pd.Series(union_categoricals([ch[c] for ch in chunks]), index=out.index)
+    return out
+
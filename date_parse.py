@@ -0,0 +1,73 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Formats seen in the property-management exports, most common first. %m/%d also accepts 8/8/2025.
+FORMATS = [
+    '%m/%d/%Y',
+    '%m/%d/%Y %I:%M %p',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%y',
+    '%d-%b-%Y',
+]
+SAMPLE_SIZE = 500
+# Parse distinct values only when they are at most this share of the rows (dates repeat a lot in exports)
+UNIQUE_SHARE = 0.5
+
+
+# First format that parses the whole sample (strings spread over the column); else the one parsing most,
+# if that is most of the sample. None means no fixed format fits and callers fall back to inference.
+def detect_format(values: pd.Series, formats: Sequence[str] = FORMATS, sample: int = SAMPLE_SIZE) -> Optional[str]:
+    s = values.dropna()
+    if len(s) > sample:
+        s = s.iloc[np.linspace(0, len(s) - 1, sample).astype(int)]
+    s = pd.Series([v.strip() for v in s if isinstance(v, str) and v.strip()], dtype=object).unique()
+    if not len(s):
+        return None
+    hits = []
+    for fmt in formats:
+        n = int(pd.to_datetime(s, format=fmt, errors='coerce').notna().sum())
+        if n == len(s):
+            return fmt
+        hits.append(n)
+    best = int(np.argmax(hits))
+    return formats[best] if hits[best] >= 0.9 * len(s) else None
+
+
+def _parse(values: pd.Series, fmt: Optional[str]) -> pd.Series:
+    if fmt is None:
+        return pd.to_datetime(values, errors='coerce')
+    out = pd.to_datetime(values, format=fmt, errors='coerce')
+    miss = out.isna() & values.notna()
+    if miss.any():  # the odd value in another layout (blank strings stay NaT either way)
+        out[miss] = pd.to_datetime(values[miss], errors='coerce')
+    return out
+
+
+# Drop-in for pd.to_datetime(values, errors='coerce'): the format is detected from a sample and applied
+# explicitly instead of inferred per element, and a column of repeated dates is parsed once per distinct
+# value and mapped back through the factorized codes. Already-datetime columns pass through.
+def parse_dates(values: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    if len(uniques) > UNIQUE_SHARE * len(values):
+        return _parse(values, fmt or detect_format(values))
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    parsed = _parse(uniques, fmt or detect_format(uniques))
+    lookup = np.append(parsed.to_numpy(), np.datetime64('NaT')).astype(parsed.dtype)
+    return pd.Series(lookup[codes], index=values.index, name=values.name)  # code -1 (missing) -> NaT
+
+
+# A single free-standing value, e.g. the report date in an export's preamble: known formats only, no
+# inference, so text like a property name is None rather than a guess
+def parse_date_value(value: object) -> Optional[pd.Timestamp]:
+    fmt = detect_format(pd.Series([value], dtype=object))
+    return pd.to_datetime(value.strip(), format=fmt) if fmt else None
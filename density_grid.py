@@ -0,0 +1,177 @@
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geo_distance import HISTORICAL_CSVS, to_float_array
+
+TILE_SIZE = 256
+CELL_PX = 8  # density cell edge in screen pixels: 32 x 32 cells per tile
+ZOOMS = range(4, 13)
+OUT_DIR = 'density'
+MAX_LAT = 85.05112878  # Web Mercator limit
+# Colour ramp for log-scaled density, low -> high (RGBA)
+RAMP = np.array([
+    [255, 255, 178, 90],
+    [254, 204, 92, 150],
+    [253, 141, 60, 190],
+    [240, 59, 32, 215],
+    [189, 0, 38, 235],
+], dtype=np.float64)
+
+
+def read_latlon(paths: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    lat: List = []
+    lon: List = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Skipping {path}: not found", file=sys.stderr)
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            headers = next(reader)
+            if 'Latitude' not in headers:
+                continue
+            # First occurrence wins (older converters duplicated the Latitude/Longitude block)
+            lat_i, lon_i = headers.index('Latitude'), headers.index('Longitude')
+            for row in reader:
+                if len(row) > max(lat_i, lon_i):
+                    lat.append(row[lat_i])
+                    lon.append(row[lon_i])
+    lat, lon = to_float_array(lat), to_float_array(lon)
+    keep = ~np.isnan(lat) & ~np.isnan(lon)
+    return lat[keep], lon[keep]
+
+
+# Global Web Mercator pixel coordinates at a zoom level (the frame Leaflet tiles use)
+def mercator_px(lat, lon, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    scale = TILE_SIZE * 2 ** zoom
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LAT, MAX_LAT))
+    x = (np.asarray(lon, dtype=np.float64) + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * scale
+    return x, y
+
+
+def unproject_px(x, y, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    scale = TILE_SIZE * 2 ** zoom
+    lon = np.asarray(x, dtype=np.float64) / scale * 360 - 180
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=np.float64) / scale))))
+    return lat, lon
+
+
+# Sparse 2-D histogram: (cell x, cell y, count) for every occupied cell_px x cell_px cell at this zoom
+def density_cells(lat: np.ndarray, lon: np.ndarray, zoom: int, cell_px: int = CELL_PX):
+    x, y = mercator_px(lat, lon, zoom)
+    n_cells = TILE_SIZE * 2 ** zoom // cell_px
+    cx = np.clip((x // cell_px).astype(np.int64), 0, n_cells - 1)
+    cy = np.clip((y // cell_px).astype(np.int64), 0, n_cells - 1)
+    keys, counts = np.unique(cy * n_cells + cx, return_counts=True)
+    return keys % n_cells, keys // n_cells, counts
+
+
+def colorize(counts: np.ndarray, max_count: int) -> np.ndarray:
+    t = np.log1p(counts) / np.log1p(max(max_count, 1))
+    stops = np.linspace(0, 1, len(RAMP))
+    rgba = np.stack([np.interp(t, stops, RAMP[:, c]) for c in range(4)], axis=-1)
+    rgba[counts == 0] = 0
+    return rgba.astype(np.uint8)
+
+
+def write_png(path: str, rgba: np.ndarray) -> None:
+    h, w, _ = rgba.shape
+    raw = np.concatenate([np.zeros((h, 1), dtype=np.uint8), rgba.reshape(h, w * 4)], axis=1).tobytes()
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0))
+                + chunk(b'IDAT', zlib.compress(raw, 9)) + chunk(b'IEND', b''))
+
+
+# XYZ tiles ({z}/{x}/{y}.png) for the occupied tiles only; colours are log-scaled to the zoom level's max
+def write_tiles(cx: np.ndarray, cy: np.ndarray, counts: np.ndarray, zoom: int, out_dir: str,
+                cell_px: int = CELL_PX) -> int:
+    per_tile = TILE_SIZE // cell_px
+    tx, ty = cx // per_tile, cy // per_tile
+    tile_keys = ty * 2 ** zoom + tx
+    order = np.argsort(tile_keys, kind='stable')
+    bounds = np.flatnonzero(np.diff(tile_keys[order])) + 1
+    max_count = int(counts.max()) if len(counts) else 1
+    written = 0
+    for part in np.split(order, bounds):
+        if not len(part):
+            continue
+        grid = np.zeros((per_tile, per_tile), dtype=np.int64)
+        grid[cy[part] % per_tile, cx[part] % per_tile] = counts[part]
+        rgba = np.repeat(np.repeat(colorize(grid, max_count), cell_px, axis=0), cell_px, axis=1)
+        tile_dir = os.path.join(out_dir, str(zoom), str(int(tx[part[0]])))
+        os.makedirs(tile_dir, exist_ok=True)
+        write_png(os.path.join(tile_dir, f"{int(ty[part[0]])}.png"), rgba)
+        written += 1
+    return written
+
+
+# One polygon per occupied cell with its count, for GeoJSON overlays (folium.GeoJson, L.geoJSON)
+def cells_geojson(cx: np.ndarray, cy: np.ndarray, counts: np.ndarray, zoom: int, cell_px: int = CELL_PX) -> Dict:
+    lat0, lon0 = unproject_px(cx * cell_px, cy * cell_px, zoom)
+    lat1, lon1 = unproject_px((cx + 1) * cell_px, (cy + 1) * cell_px, zoom)
+    features = []
+    for a, b, c, d, n in zip(np.round(lon0, 5), np.round(lat0, 5), np.round(lon1, 5), np.round(lat1, 5), counts):
+        ring = [[a, b], [c, b], [c, d], [a, d], [a, b]]
+        features.append({'type': 'Feature', 'properties': {'count': int(n)},
+                         'geometry': {'type': 'Polygon', 'coordinates': [[[float(u), float(v)] for u, v in ring]]}})
+    return {'type': 'FeatureCollection', 'properties': {'zoom': zoom, 'max_count': int(counts.max()) if len(counts) else 0},
+            'features': features}
+
+
+def parse_zooms(s: str) -> List[int]:
+    lo, _, hi = s.partition('-')
+    return list(range(int(lo), int(hi or lo) + 1))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Pre-bin geocoded prospects into density tiles / GeoJSON for map overlays.')
+    p.add_argument('csvs', nargs='*', default=HISTORICAL_CSVS)
+    p.add_argument('--out-dir', default=OUT_DIR)
+    p.add_argument('--zooms', type=parse_zooms, default=list(ZOOMS), help='Zoom range, e.g. "4-12" (default: 4-12)')
+    p.add_argument('--cell-px', type=int, default=CELL_PX, help='Cell edge in pixels; must divide 256')
+    p.add_argument('--format', default='png,geojson', help='Comma-separated: png (XYZ tiles), geojson (one file per zoom)')
+    args = p.parse_args(argv)
+    if TILE_SIZE % args.cell_px:
+        p.error('--cell-px must divide 256')
+    formats = {f.strip().lower() for f in args.format.split(',') if f.strip()}
+    if not formats or formats - {'png', 'geojson'}:
+        p.error('--format takes png and/or geojson')
+
+    lat, lon = read_latlon(args.csvs)
+    os.makedirs(args.out_dir, exist_ok=True)
+    # Only what was written is listed: 'tiles' (relative to the index) with png, per-level geojson names
+    index = {'points': int(len(lat)), 'cell_px': args.cell_px, 'levels': {}}
+    if 'png' in formats:
+        index['tiles'] = 'tiles/{z}/{x}/{y}.png'
+    for zoom in args.zooms:
+        cx, cy, counts = density_cells(lat, lon, zoom, args.cell_px)
+        level = {'cells': int(len(counts)), 'max_count': int(counts.max()) if len(counts) else 0}
+        if 'png' in formats:
+            level['tiles'] = write_tiles(cx, cy, counts, zoom, os.path.join(args.out_dir, 'tiles'), args.cell_px)
+        if 'geojson' in formats:
+            level['geojson'] = f"density_z{zoom}.geojson"
+            with open(os.path.join(args.out_dir, level['geojson']), 'w', encoding='utf-8') as f:
+                json.dump(cells_geojson(cx, cy, counts, zoom, args.cell_px), f, separators=(',', ':'))
+        index['levels'][str(zoom)] = level
+        print(f"z{zoom}: {level['cells']} cells, max {level['max_count']}"
+              + (f", {level['tiles']} tiles" if 'tiles' in level else ''))
+    with open(os.path.join(args.out_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    print(f"Wrote {args.out_dir}/ from {len(lat)} points")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import csv
+import os
+import sys
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MI = 3958.8
+DIST_HEADER = 'Distance to Univ (mi)'
+UNIVERSITY_COORDS = (47.758284, -122.191377)
+MAX_MATRIX_CELLS = 1_000_000  # ~8 MB of float64 per distance-matrix block
+
+# *_with_distances.csv outputs that can be re-measured without touching the geocoder
+HISTORICAL_CSVS = [
+    'Bothell_with_distances.csv',
+    'Bothell_Transfer_with_distances.csv',
+    'FirstYear_with_distances.csv',
+    'Future_resident_with_distances.csv',
+    'Past_resident_with_distances.csv',
+    'Past_resident_2324_with_distances.csv',
+]
+
+
+# Vectorized haversine: lat/lon are (N,) arrays, ref_lat/ref_lon scalars -> (N,) or (M,) arrays -> (N, M).
+# NaN coordinates propagate to NaN distances.
+def haversine_np(lat, lon, ref_lat, ref_lon) -> np.ndarray:
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    ref_lat = np.radians(np.asarray(ref_lat, dtype=np.float64))
+    ref_lon = np.radians(np.asarray(ref_lon, dtype=np.float64))
+    if ref_lat.ndim:
+        lat, lon = lat[:, None], lon[:, None]
+    dlat = ref_lat - lat
+    dlon = ref_lon - lon
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(ref_lat) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_MI * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# Stream the (N, M) distance matrix in row blocks so peak memory is ~max_cells floats, not N*M
+def distance_matrix_chunks(lat, lon, ref_lat, ref_lon,
+                           max_cells: int = MAX_MATRIX_CELLS) -> Iterator[Tuple[int, np.ndarray]]:
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    m = max(len(np.atleast_1d(ref_lat)), 1)
+    step = max(max_cells // m, 1)
+    for start in range(0, len(lat), step):
+        yield start, haversine_np(lat[start:start + step], lon[start:start + step],
+                                  np.atleast_1d(ref_lat), np.atleast_1d(ref_lon))
+
+
+# Index of (and distance to) the closest of M targets for each of N points; -1 / NaN where the point is NaN
+def nearest_target(lat, lon, ref_lat, ref_lon, max_cells: int = MAX_MATRIX_CELLS) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(lat)
+    idx = np.full(n, -1, dtype=np.int64)
+    dist = np.full(n, np.nan, dtype=np.float64)
+    for start, block in distance_matrix_chunks(lat, lon, ref_lat, ref_lon, max_cells):
+        valid = ~np.isnan(block).all(axis=1)
+        best = np.argmin(np.where(np.isnan(block), np.inf, block), axis=1)
+        rows = np.arange(start, start + len(block))
+        idx[rows[valid]] = best[valid]
+        dist[rows[valid]] = block[valid, best[valid]]
+    return idx, dist
+
+
+def to_float_array(values: Sequence) -> np.ndarray:
+    out = np.full(len(values), np.nan, dtype=np.float64)
+    for i, v in enumerate(values):
+        if v is None or v == '':
+            continue
+        try:
+            out[i] = float(v)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+# Rewrite the distance column of a *_with_distances.csv against a new reference point
+def recompute_csv(path: str, ref: Tuple[float, float], out_path: Optional[str] = None,
+                  header: str = DIST_HEADER) -> int:
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        rows = list(reader)
+    # First occurrence wins: older converters appended a second, empty Latitude/Longitude block
+    lat_i, lon_i = headers.index('Latitude'), headers.index('Longitude')
+    if header not in headers:
+        headers.append(header)
+    dist_i = headers.index(header)
+    lat = to_float_array([r[lat_i] if lat_i < len(r) else None for r in rows])
+    lon = to_float_array([r[lon_i] if lon_i < len(r) else None for r in rows])
+    dist = np.round(haversine_np(lat, lon, ref[0], ref[1]), 2)
+    for r, d in zip(rows, dist):
+        if len(r) <= dist_i:
+            r.extend([''] * (dist_i + 1 - len(r)))
+        r[dist_i] = '' if np.isnan(d) else float(d)
+    with open(out_path or path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+    return int(np.count_nonzero(~np.isnan(dist)))
+
+
+def parse_point(s: str) -> Tuple[float, float]:
+    lat, lon = (float(x) for x in s.split(','))
+    return lat, lon
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Recompute distance columns for geocoded CSVs against a reference point.')
+    p.add_argument('csvs', nargs='*', default=HISTORICAL_CSVS)
+    p.add_argument('--ref', type=parse_point, default=UNIVERSITY_COORDS, help='Reference point as "lat,lon"')
+    p.add_argument('--header', default=DIST_HEADER, help='Distance column to (re)write')
+    p.add_argument('--suffix', default='', help='Write <name><suffix>.csv instead of overwriting')
+    args = p.parse_args(argv)
+    for path in args.csvs:
+        if not os.path.exists(path):
+            print(f"Skipping {path}: not found", file=sys.stderr)
+            continue
+        out = os.path.splitext(path)[0] + args.suffix + '.csv' if args.suffix else path
+        n = recompute_csv(path, args.ref, out, args.header)
+        print(f"{out}: {n} distances to {args.ref}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import os
+import re
+import sqlite3
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from geocode_client import GeocodeClient
+
+CACHE_PATH = os.environ.get('GEOCODE_CACHE_PATH', 'geocode_cache.sqlite')
+
+# Resolved addresses rarely move; misses are retried sooner in case Nominatim improves
+HIT_TTL_DAYS = 365
+MISS_TTL_DAYS = 30
+FETCH_CHUNK = 32
+
+Coords = Tuple[Optional[float], Optional[float]]
+
+
+def normalize_address(address: str) -> str:
+    s = re.sub(r"\s*,\s*", ", ", str(address or ''))
+    return re.sub(r"\s+", " ", s).strip().strip(',').strip().lower()
+
+
+class GeocodeCache:
+    def __init__(self, path: str = CACHE_PATH, hit_ttl_days: float = HIT_TTL_DAYS,
+                 miss_ttl_days: float = MISS_TTL_DAYS):
+        self.path = path
+        self.hit_ttl_s = hit_ttl_days * 86400
+        self.miss_ttl_s = miss_ttl_days * 86400
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS geocode ('
+            ' key TEXT PRIMARY KEY,'
+            ' address TEXT,'
+            ' lat REAL,'
+            ' lon REAL,'
+            ' hit INTEGER NOT NULL,'
+            ' fetched_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    # Returns None when the address is not cached (or expired), otherwise (lat, lon);
+    # a cached miss comes back as (None, None)
+    def get(self, address: str) -> Optional[Coords]:
+        row = self.conn.execute(
+            'SELECT lat, lon, hit, fetched_at FROM geocode WHERE key = ?',
+            (normalize_address(address),)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        lat, lon, hit, fetched_at = row
+        ttl = self.hit_ttl_s if hit else self.miss_ttl_s
+        if time.time() - fetched_at > ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return (lat, lon) if hit else (None, None)
+
+    def put(self, address: str, lat: Optional[float], lon: Optional[float]) -> None:
+        hit = lat is not None and lon is not None
+        self.conn.execute(
+            'INSERT OR REPLACE INTO geocode (key, address, lat, lon, hit, fetched_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (normalize_address(address), str(address), lat, lon, int(hit), time.time())
+        )
+        self.conn.commit()
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        cur = self.conn.execute(
+            'DELETE FROM geocode WHERE (hit = 1 AND fetched_at < ?) OR (hit = 0 AND fetched_at < ?)',
+            (now - self.hit_ttl_s, now - self.miss_ttl_s)
+        )
+        self.conn.commit()
+        return cur.rowcount
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+_default_cache: Optional[GeocodeCache] = None
+_default_client: Optional[GeocodeClient] = None
+
+
+def get_cache() -> GeocodeCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GeocodeCache()
+        _default_cache.evict_expired()
+    return _default_cache
+
+
+def get_client() -> GeocodeClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = GeocodeClient()
+    return _default_client
+
+
+# Geocode address using the on-disk cache first, Nominatim only for new addresses
+def geocode(address: str, cache: Optional[GeocodeCache] = None,
+            client: Optional[GeocodeClient] = None) -> Coords:
+    return geocode_many([address], cache, client)[0]
+
+
+# Batch variant: cached addresses are answered locally, the rest go to the client concurrently.
+# Network errors are not cached so the next run retries them.
+def geocode_many(addresses: Sequence[str], cache: Optional[GeocodeCache] = None,
+                 client: Optional[GeocodeClient] = None) -> List[Coords]:
+    cache = cache or get_cache()
+    results: List[Optional[Coords]] = [cache.get(a) for a in addresses]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if pending:
+        client = client or get_client()
+    # Cache each chunk as it lands so an interrupted run keeps what it already paid for
+    for start in range(0, len(pending), FETCH_CHUNK):
+        chunk = pending[start:start + FETCH_CHUNK]
+        fetched = client.geocode_many([addresses[i] for i in chunk])
+        for i, (lat, lon, ok) in zip(chunk, fetched):
+            if ok:
+                cache.put(addresses[i], lat, lon)
+            results[i] = (lat, lon)
+    return results
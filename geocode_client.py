@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'AberrantZipLookup/1.0 (your_email@example.com)'
+# Point at a self-hosted Nominatim (or a local stub) and raise the rate to match it
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org/search')
+RATE_PER_S = float(os.environ.get('GEOCODE_RATE', '1'))  # public Nominatim policy: 1 req/s
+BURST = int(os.environ.get('GEOCODE_BURST', '1'))
+WORKERS = int(os.environ.get('GEOCODE_WORKERS', '4'))
+MAX_RETRIES = 4
+BACKOFF_S = 1.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+Result = Tuple[Optional[float], Optional[float], bool]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Block until a token is available; waiting happens outside the lock
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class GeocodeClient:
+    def __init__(self, base_url: str = NOMINATIM_URL, rate: float = RATE_PER_S, burst: int = BURST,
+                 workers: int = WORKERS, max_retries: int = MAX_RETRIES, timeout: float = 10):
+        self.base_url = base_url
+        self.limiter = TokenBucket(rate, burst)
+        self.workers = max(workers, 1)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    # ok is False when every attempt failed, so callers don't cache it as a miss
+    def geocode(self, address: str) -> Result:
+        params = {'q': address, 'format': 'json', 'limit': 1}
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                resp = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                if resp.status_code in RETRY_STATUS:
+                    retry_after = resp.headers.get('Retry-After')
+                    raise requests.HTTPError(f"{resp.status_code} from geocoder", response=resp)
+                resp.raise_for_status()
+                data = resp.json()
+                if data:
+                    return float(data[0]['lat']), float(data[0]['lon']), True
+                return None, None, True
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = e.response.status_code if getattr(e, 'response', None) is not None else None
+                if (status is not None and status not in RETRY_STATUS) or attempt == self.max_retries:
+                    print(f"Geocode error for '{address}': {e}")
+                    return None, None, False
+                delay = BACKOFF_S * (2 ** attempt)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                time.sleep(delay)
+            except Exception as e:
+                print(f"Geocode error for '{address}': {e}")
+                return None, None, False
+        return None, None, False
+
+    # Requests overlap across worker threads; throughput is bounded by the token bucket
+    def geocode_many(self, addresses: Sequence[str]) -> List[Result]:
+        if self.workers == 1 or len(addresses) <= 1:
+            return [self.geocode(a) for a in addresses]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self.geocode, addresses))
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,234 @@
+import argparse
+import csv
+import os
+import sys
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import openpyxl
+
+from geo_distance import UNIVERSITY_COORDS, distance_matrix_chunks, haversine_np, nearest_target, parse_point
+from geocode_cache import GeocodeCache, geocode_many
+from geocode_client import GeocodeClient, BURST, NOMINATIM_URL, RATE_PER_S, WORKERS
+from geocode_journal import RowJournal, geocode_rows, journal_path, row_key
+from sheet_io import pad, read_sheet, write_columnar
+from zip_centroids import geocode_zip, geocode_zip_many
+
+OUTPUT_SUFFIX = '_with_distances'
+OUT_HEADERS = ['Latitude', 'Longitude', 'Distance to Univ (mi)']
+FORMATS = ('csv', 'parquet', 'xlsx')
+
+Target = Tuple[str, float, float]
+
+# Single streaming pass over the sheet (or the user's column list instead of the known layouts)
+def read_input(in_path: str, columns: Optional[List[str]] = None, country: Optional[str] = None):
+    candidates = [{'must_have': columns, 'parts': columns, 'country': country}] if columns else None
+    return read_sheet(in_path, candidates)
+
+
+def build_address(values: Sequence, colmap: Dict[str, int], layout: dict) -> str:
+    def cell(name):
+        idx = colmap.get(name)
+        return values[idx] if idx is not None and idx < len(values) else None
+    parts = [str(p) for p in (cell(name) for name in layout['parts']) if p]
+    if not parts:
+        return ''
+    country = cell(layout['country']) if layout['country'] else None
+    return ', '.join(parts + [str(country or 'USA')])
+
+
+# Output path without extension; each format adds its own
+def default_output(in_path: str) -> str:
+    base = os.path.splitext(os.path.basename(in_path))[0]
+    return os.path.join(os.path.dirname(in_path), f"{base}{OUTPUT_SUFFIX}")
+
+
+# Nearest of the named targets (campus, properties) plus, optionally, one distance column per target
+def target_columns(lat: np.ndarray, lon: np.ndarray, targets: List[Target], detail: bool = False) -> List[Tuple[str, list]]:
+    if not targets:
+        return []
+    names = [name for name, _, _ in targets]
+    t_lat = np.array([t[1] for t in targets])
+    t_lon = np.array([t[2] for t in targets])
+    idx, dist = nearest_target(lat, lon, t_lat, t_lon)
+    cols = [('Nearest Target', [names[i] if i >= 0 else '' for i in idx]),
+            ('Nearest Target (mi)', np.round(dist, 2).tolist())]
+    if detail:
+        blocks = [block for _, block in distance_matrix_chunks(lat, lon, t_lat, t_lon)]
+        matrix = np.round(np.vstack(blocks), 2) if blocks else np.empty((0, len(targets)))
+        cols += [(f"Distance to {name} (mi)", matrix[:, j].tolist()) for j, name in enumerate(names)]
+    return cols
+
+
+def process_file(in_path: str, out_base: str, locate_many, uni: Tuple[float, float], formats: Sequence[str] = ('csv',),
+                 columns: Optional[List[str]] = None, country: Optional[str] = None,
+                 targets: Optional[List[Target]] = None, target_detail: bool = False) -> None:
+    layout, header_row_idx, headers, preamble, data = read_input(in_path, columns, country)
+    colmap = {name: idx for idx, name in enumerate(headers) if name is not None}
+    missing = [c for c in layout['parts'] if c not in colmap]
+    if missing:
+        print(f"{in_path}: optional columns not present: {missing}")
+
+    rows = range(header_row_idx + 1, header_row_idx + 1 + len(data))
+    addresses = [build_address(values, colmap, layout) if any(values) else '' for values in data]
+
+    # Completed rows are journaled as they resolve, so an interrupted run resumes where it stopped
+    journal = RowJournal(journal_path(out_base))
+    keys = [row_key(row, address) for row, address in zip(rows, addresses)]
+    results = geocode_rows(keys, addresses, locate_many, journal)
+    # Distance column for the whole sheet in one NumPy pass (NaN where geocoding missed)
+    lat = np.array([np.nan if r[0] is None else r[0] for r in results], dtype=np.float64)
+    lon = np.array([np.nan if r[1] is None else r[1] for r in results], dtype=np.float64)
+    found = ~np.isnan(lat) & ~np.isnan(lon)
+    missed = int((np.array([bool(a) for a in addresses], dtype=bool) & ~found).sum())
+    out_cols = [('Latitude', lat.tolist()), ('Longitude', lon.tolist()),
+                (OUT_HEADERS[2], np.round(haversine_np(lat, lon, uni[0], uni[1]), 2).tolist())]
+    out_cols += target_columns(lat, lon, targets or [], target_detail)
+    out_headers = [name for name, _ in out_cols]
+
+    # Re-enriching an enriched file replaces its old output columns instead of appending a second set
+    keep = [j for j, h in enumerate(headers) if h not in out_headers]
+    out_header_row = [headers[j] for j in keep] + out_headers
+
+    def out_row(i: int, values: Sequence) -> list:
+        values = pad(values, len(headers))
+        return [values[j] for j in keep] + [col[i] if found[i] else '' for _, col in out_cols]
+
+    # One pass over the rows feeds every requested format
+    paths = {fmt: f"{out_base}.{fmt}" for fmt in formats}
+    csv_file = open(paths['csv'], 'w', newline='', encoding='utf-8') if 'csv' in paths else None
+    csv_writer = csv.writer(csv_file) if csv_file else None
+    out_wb = out_ws = None
+    if 'xlsx' in paths:
+        # Write-only workbook: rows are serialized as they are appended, no cell object model
+        out_wb = openpyxl.Workbook(write_only=True)
+        out_ws = out_wb.create_sheet()
+        for values in preamble:
+            out_ws.append(list(values))
+        out_ws.append(out_header_row)
+    columnar: List[list] = []
+    if csv_writer:
+        csv_writer.writerow(out_header_row)
+    for i, values in enumerate(data):
+        if not any(values):
+            if out_ws is not None:
+                out_ws.append([])
+            continue
+        row = out_row(i, values)
+        if csv_writer:
+            csv_writer.writerow(row)
+        if out_ws is not None:
+            out_ws.append(row)
+        if 'parquet' in paths:
+            columnar.append(row)
+    if csv_file:
+        csv_file.close()
+    if out_wb is not None:
+        out_wb.save(paths['xlsx'])
+    if 'parquet' in paths:
+        write_columnar(paths['parquet'], out_header_row, columnar)
+    journal.discard()
+    print(f"Saved: {', '.join(paths.values())} ({int(found.sum())}/{len(data)} rows geocoded)")
+    if missed:
+        hint = (' (ZIP missing from zip_centroids.csv; rerun without --offline for street-level lookups)'
+                if locate_many is geocode_zip_many else '')
+        print(f"WARNING: {missed} rows with an address were left without coordinates{hint}", file=sys.stderr)
+
+
+def resolve_targets(specs: List[str], locate, uni: Tuple[float, float]) -> List[Target]:
+    if not specs:
+        return []
+    targets = [('Campus', uni[0], uni[1])]
+    for spec in specs:
+        name, _, where = spec.partition('=')
+        try:
+            lat, lon = (float(x) for x in where.split(','))
+        except ValueError:
+            lat, lon = locate(where)
+        if lat is None or lon is None:
+            print(f"ERROR: Could not locate target {name!r} ({where})", file=sys.stderr)
+            continue
+        targets.append((name.strip(), lat, lon))
+    return targets
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Geocode address lists and add distance to the university.')
+    p.add_argument('inputs', nargs='+', help='Input workbooks (.xlsx)')
+    p.add_argument('-o', '--output', action='append', default=[],
+                   help=f"Output path, once per input in order; the extension follows --format "
+                        f"(default: <input>{OUTPUT_SUFFIX}.<format>)")
+    p.add_argument('--format', default='csv',
+                   help=f"Comma-separated output formats from {', '.join(FORMATS)} (default: csv)")
+    p.add_argument('--columns', help='Comma-separated address columns in order (default: auto-detect layout)')
+    p.add_argument('--country-column', help='Country column used with --columns (default: USA)')
+    p.add_argument('--offline', action='store_true',
+                   help='ZIP-centroid coordinates from zip_centroids.csv instead of street-level Nominatim lookups '
+                        '(no network; rows whose ZIP is not in the table stay blank and are counted)')
+    p.add_argument('--base-url', default=NOMINATIM_URL, help='Nominatim search endpoint')
+    p.add_argument('--rate', type=float, default=RATE_PER_S, help='Requests per second')
+    p.add_argument('--burst', type=int, default=BURST)
+    p.add_argument('--workers', type=int, default=WORKERS)
+    p.add_argument('--university',
+                   help='Reference point for the distance column, "lat,lon" or an address to geocode '
+                        f"(default: the campus at {UNIVERSITY_COORDS[0]},{UNIVERSITY_COORDS[1]})")
+    p.add_argument('--target', action='append', default=[], metavar='NAME=ADDRESS',
+                   help='Property/location for the nearest-target columns (ADDRESS may be "lat,lon"); '
+                        'the campus is always included when any target is given')
+    p.add_argument('--target-detail', action='store_true', help='Also write one distance column per target')
+    args = p.parse_args(argv)
+    if args.output and len(args.output) != len(args.inputs):
+        p.error('--output must be given once per input')
+    args.formats = [f.strip().lower() for f in args.format.split(',') if f.strip()]
+    bad = [f for f in args.formats if f not in FORMATS]
+    if bad or not args.formats:
+        p.error(f"unknown --format {bad}; choose from {', '.join(FORMATS)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    columns = [c.strip() for c in args.columns.split(',')] if args.columns else None
+
+    # One cache and one rate limiter shared by every file in the run
+    if not args.offline:
+        cache = GeocodeCache()
+        cache.evict_expired()
+        client = GeocodeClient(args.base_url, args.rate, args.burst, args.workers)
+        locate_many = partial(geocode_many, cache=cache, client=client)
+        locate = lambda address: locate_many([address])[0]
+    else:
+        locate, locate_many = geocode_zip, geocode_zip_many
+
+    # Fixed campus coordinates by default: geocoding the address would give its ZIP centroid offline
+    uni_lat, uni_lon = UNIVERSITY_COORDS
+    if args.university:
+        try:
+            uni_lat, uni_lon = parse_point(args.university)
+        except ValueError:
+            uni_lat, uni_lon = locate(args.university)
+        assert uni_lat is not None and uni_lon is not None, 'University address geocoding failed.'
+
+    targets = resolve_targets(args.target, locate, (uni_lat, uni_lon))
+
+    outputs = [os.path.splitext(o)[0] for o in args.output] or [default_output(p) for p in args.inputs]
+    for in_path, out_base in zip(args.inputs, outputs):
+        if not os.path.exists(in_path):
+            print(f"ERROR: File not found: {in_path}", file=sys.stderr)
+            continue
+        print(f"\n== {in_path} -> {out_base} ({', '.join(args.formats)})")
+        process_file(in_path, out_base, locate_many, (uni_lat, uni_lon), args.formats, columns, args.country_column,
+                     targets, args.target_detail)
+
+
+# Entry point for the calculate_*.py presets: writes the preset's output unless --output names another.
+# Re-runs are cheap (cached lookups, journaled rows), so an existing output is simply refreshed.
+def run_preset(in_path: str, out_path: str, argv: List[str]) -> None:
+    if any(a in ('-o', '--output') or a.startswith('--output=') for a in argv):
+        return main([in_path] + argv)
+    main([in_path, '--output', out_path] + argv)
+
+
+if __name__ == '__main__':
+    main()
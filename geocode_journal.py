@@ -0,0 +1,71 @@
+import json
+import os
+from typing import Callable, Dict, List, Sequence
+
+from address_dedup import Coords, geocode_unique
+
+
+def journal_path(output_path: str) -> str:
+    return output_path + '.journal.jsonl'
+
+
+# Append-only journal of row-key -> (lat, lon); one JSON object per line, flushed per chunk. Distances are
+# not journaled: the caller derives them from the coordinates for the whole sheet in one pass.
+class RowJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.rows: Dict[str, Coords] = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted write
+                    self.rows[e['key']] = (e['lat'], e['lon'])
+        self.f = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def get(self, key: str) -> Coords:
+        return self.rows.get(key, (None, None))
+
+    def record(self, key: str, lat: float, lon: float) -> None:
+        self.rows[key] = (lat, lon)
+        self.f.write(json.dumps({'key': key, 'lat': lat, 'lon': lon}) + '\n')
+
+    def flush(self) -> None:
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self) -> None:
+        self.f.close()
+
+    # Call once the output has been saved; the next run then starts fresh
+    def discard(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def row_key(row: int, address: str) -> str:
+    return f"{row}|{address}"
+
+
+# Geocode the rows not already in the journal, checkpointing every chunk; returns (lat, lon) per key.
+# Misses are not journaled so a resumed run retries them (the geocode cache answers repeat misses).
+def geocode_rows(keys: Sequence[str], addresses: Sequence[str],
+                 geocode_many: Callable[[List[str]], List[Coords]], journal: RowJournal) -> List[Coords]:
+    todo = [i for i, k in enumerate(keys) if k not in journal]
+    if len(todo) < len(keys):
+        print(f"Resuming: {len(keys) - len(todo)} rows already in {journal.path}")
+
+    def checkpoint(idx: List[int], coords: List[Coords]) -> None:
+        for i, (lat, lon) in zip(idx, coords):
+            if lat is not None and lon is not None:
+                journal.record(keys[todo[i]], lat, lon)
+        journal.flush()
+
+    geocode_unique([addresses[i] for i in todo], geocode_many, on_result=checkpoint)
+    return [journal.get(k) for k in keys]
@@ -0,0 +1,141 @@
+import warnings
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from date_parse import parse_dates
+
+# Funnel stages in order, as normalized column names; the first is the cohort date
+STAGES = [
+    'created on',
+    'first visit/tour',
+    'application - started',
+    'application - partially completed',
+    'application - completed',
+    'application - approved',
+    'lease - started',
+    'lease - partially completed',
+    'lease - completed',
+    'lease - approved',
+    'move-in',
+]
+# Exits: reported alongside the funnel but never a step in it
+EXIT_STAGES = ['cancelled on', 'denied on']
+WITHIN_DAYS = [30, 60, 90]
+PERCENTILES = [25, 50, 75, 90]
+
+NAT = np.datetime64('NaT', 'D')
+
+
+# Every stage timestamp parsed once into an (N, K) datetime64[D] matrix (NaT where a lead never got there)
+def stage_matrix(df: pd.DataFrame, stages: Sequence[str] = STAGES + EXIT_STAGES,
+                 parse=None) -> Tuple[List[str], np.ndarray]:
+    parse = parse or parse_dates
+    names = [s for s in stages if s in df.columns]
+    m = np.full((len(df), len(names)), NAT, dtype='datetime64[D]')
+    for j, name in enumerate(names):
+        m[:, j] = parse(df[name]).values.astype('datetime64[D]')
+    return names, m
+
+
+# Days from each lead's created date to each stage: float (N, K), NaN where not reached or reached "before" creation
+def days_from_created(m: np.ndarray) -> np.ndarray:
+    d = (m - m[:, :1]).astype('timedelta64[D]').astype(np.float64)
+    d[np.isnat(m) | np.isnat(m[:, :1])] = np.nan
+    d[d < 0] = np.nan
+    return d
+
+
+# For leads created in each month (per property when given), how many reached each of the `stages` (matrix
+# columns) within N days. One bincount per (stage, window) over the cohort codes; no row loops.
+# Right-censoring: a cohort is Mature for N only if its last-created lead had N days before `as_of` (the
+# export date; default the latest created date). Younger cohorts keep their counts but get no Rate %, since
+# their leads have not all had the time to get there yet.
+def _cohort_counts(names: List[str], m: np.ndarray, stages: Sequence[int], within: Sequence[int],
+                   properties: Optional[pd.Series], as_of=None) -> pd.DataFrame:
+    created = m[:, 0]
+    valid = ~np.isnat(created)
+    if as_of is None:
+        as_of = created[valid].max() if valid.any() else NAT
+    as_of = np.datetime64(as_of, 'D')
+    month = created[valid].astype('datetime64[M]')
+    prop = (properties[valid].fillna('').astype(str).values if properties is not None
+            else np.full(int(valid.sum()), '', dtype=object))
+    keys = pd.MultiIndex.from_arrays([prop, month], names=['Property', 'Cohort'])
+    codes, cohorts = pd.factorize(keys, sort=True)
+    n_cohorts = len(cohorts)
+    leads = np.bincount(codes, minlength=n_cohorts)
+    d = days_from_created(m[valid])
+    last_day = (cohorts.get_level_values(1).values.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+
+    rows = []
+    for j in stages:
+        for n in within:
+            reached = np.bincount(codes, weights=(d[:, j] <= n), minlength=n_cohorts).astype(np.int64)
+            mature = last_day + np.timedelta64(n, 'D') <= as_of
+            rows.append(pd.DataFrame({
+                'Property': cohorts.get_level_values(0), 'Cohort': cohorts.get_level_values(1),
+                'Stage': names[j], 'Within (days)': n, 'Leads': leads, 'Reached': reached,
+                'Rate %': np.where(mature, np.round(reached / np.maximum(leads, 1) * 100.0, 2), np.nan),
+                'Mature': mature,
+            }))
+    out = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+    if len(out):
+        out['Cohort'] = pd.to_datetime(out['Cohort']).dt.strftime('%b %Y')
+    return out
+
+
+# The funnel: every stage after the cohort date except the exits
+def cohort_funnel(names: List[str], m: np.ndarray, within: Sequence[int] = WITHIN_DAYS,
+                  properties: Optional[pd.Series] = None, as_of=None) -> pd.DataFrame:
+    return _cohort_counts(names, m, [j for j, s in enumerate(names) if j and s not in EXIT_STAGES], within,
+                          properties, as_of)
+
+
+# The exits, same shape: leads created in each month cancelled or denied within N days
+def cohort_exits(names: List[str], m: np.ndarray, within: Sequence[int] = WITHIN_DAYS,
+                 properties: Optional[pd.Series] = None, as_of=None) -> pd.DataFrame:
+    return _cohort_counts(names, m, [j for j, s in enumerate(names) if j and s in EXIT_STAGES], within,
+                          properties, as_of)
+
+
+# Days between stage pairs: created (column 0, whatever its name) -> every stage, and each funnel stage ->
+# the next funnel stage, over the leads that reached both (negative gaps are data-entry noise and dropped).
+# Percentiles in one call per set.
+def stage_latency(names: List[str], m: np.ndarray, percentiles: Sequence[int] = PERCENTILES) -> pd.DataFrame:
+    funnel = [j for j, s in enumerate(names) if j and s not in EXIT_STAGES]
+    pairs = [(0, j) for j in range(1, len(names))] + \
+            [(a, b) for a, b in zip(funnel[:-1], funnel[1:])]
+    if not pairs:
+        return pd.DataFrame()
+    a = np.array([p[0] for p in pairs])
+    b = np.array([p[1] for p in pairs])
+    d = (m[:, b] - m[:, a]).astype('timedelta64[D]').astype(np.float64)
+    d[np.isnat(m[:, b]) | np.isnat(m[:, a])] = np.nan
+    d[d < 0] = np.nan
+    count = (~np.isnan(d)).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN pairs (e.g. nobody was denied) stay NaN
+        pct = np.nanpercentile(d, percentiles, axis=0) if len(d) else np.full((len(percentiles), len(pairs)), np.nan)
+        mean = np.nanmean(d, axis=0) if len(d) else np.full(len(pairs), np.nan)
+    out = pd.DataFrame({'From': [names[i] for i in a], 'To': [names[j] for j in b], 'Leads': count,
+                        'Mean (days)': np.round(mean, 1)})
+    for q, row in zip(percentiles, pct):
+        out[f"P{q} (days)"] = np.round(row, 1)
+    return out
+
+
+# Wide view of one window: a row per cohort, a column per stage (rate %; blank for immature cohorts)
+def funnel_table(funnel: pd.DataFrame, within: int) -> pd.DataFrame:
+    if funnel.empty:
+        return funnel
+    sub = funnel[funnel['Within (days)'] == within]
+    keys = ['Property', 'Cohort', 'Leads', 'Mature']
+    order = list(dict.fromkeys(sub['Stage']))
+    wide = sub.pivot(index=keys, columns='Stage', values='Rate %')
+    wide = wide.reindex(pd.MultiIndex.from_frame(sub[keys].drop_duplicates()))[order].reset_index()
+    wide.columns.name = None
+    if wide['Property'].nunique() <= 1:
+        wide = wide.drop(columns='Property')
+    return wide
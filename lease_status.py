@@ -0,0 +1,40 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Statuses that never count toward prelease, whatever else they say
+EXCLUDED_TOKENS = ['cancel', 'declin', 'notice', 'denied', 'withdraw', 'transfer pending']
+RULES = ('loose', 'strict')
+
+
+def normalize_series(values: pd.Series) -> pd.Series:
+    return values.fillna('').astype(str).str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+
+
+# Rules over already-normalized status strings -> (is_renewal, is_new)
+#   loose:  anything mentioning 'renew' is a renewal, otherwise anything mentioning 'new' is new
+#   strict: only 'Renewal Lease Approved' is a renewal and only 'Lease Approved' (no 'renewal') is new
+def _apply_rules(s: pd.Series, rules: str) -> Tuple[np.ndarray, np.ndarray]:
+    excluded = s.str.contains('|'.join(EXCLUDED_TOKENS), regex=True).to_numpy()
+    if rules == 'strict':
+        approved = (s.str.contains('lease', regex=False) & s.str.contains('approved', regex=False)).to_numpy()
+        renewal = s.str.contains('renewal', regex=False).to_numpy()
+        is_renewal, is_new = approved & renewal, approved & ~renewal
+    elif rules == 'loose':
+        is_renewal = s.str.contains('renew', regex=False).to_numpy()
+        is_new = ~is_renewal & s.str.contains('new', regex=False).to_numpy()
+    else:
+        raise ValueError(f"unknown rules {rules!r}; choose from {', '.join(RULES)}")
+    return is_renewal & ~excluded, is_new & ~excluded
+
+
+# Classify a status column: the rules run once per distinct status value and are broadcast back
+# through the factorized codes, so cost tracks the handful of statuses, not the row count
+def classify_statuses(status: pd.Series, rules: str = 'loose') -> Tuple[pd.Series, pd.Series]:
+    codes, uniques = pd.factorize(status, use_na_sentinel=True)
+    labels = normalize_series(pd.Series(np.append(np.asarray(uniques, dtype=object), None)))
+    renewal, new = _apply_rules(labels, rules)
+    codes = np.where(codes < 0, len(uniques), codes)  # missing status -> the trailing '' entry
+    return (pd.Series(renewal[codes], index=status.index, name='_is_renewal'),
+            pd.Series(new[codes], index=status.index, name='_is_new'))
@@ -0,0 +1,193 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from geo_distance import DIST_HEADER, UNIVERSITY_COORDS, haversine_np, to_float_array
+
+COORD_SCALE = 100_000  # 1e-5 deg ~ 1 m; ZIP-centroid coordinates lose nothing
+DIST_SCALE = 100  # hundredths of a mile, same rounding as the CSV column
+RADIUS_BUCKETS = [0, 10, 50, 200, 10000]  # must match RADIUS_BUCKETS in the map pages
+HOUSING_VALUES = ['Unknown', 'Yes', 'No']
+INDEX_PATH = 'map_payloads.json'
+
+# Same datasets and columns as master_map.html
+DATASETS = {
+    'firstyear': {
+        'csv': 'FirstYear_with_distances.csv',
+        'housing': 'Interested in Campus Housing?',
+        'label': ['Street 1', 'Street 2', 'City', 'State', 'ZipCode'],
+    },
+    'transfer': {
+        'csv': 'Bothell_Transfer_with_distances.csv',
+        'housing': 'Interested in Campus Housing?',
+        'label': ['Street 1', 'Street 2', 'City', 'State', 'ZipCode'],
+    },
+    'bothell': {
+        'csv': 'Bothell_with_distances.csv',
+        'housing': 'Interested in Campus Housing?',
+        'label': ['Street 1', 'Street 2', 'City', 'State', 'ZipCode'],
+    },
+    'future': {
+        'csv': 'Future_resident_with_distances.csv',
+        'label': ['Street Line1', 'Street Line2', 'Street Line3', 'City', 'State/Province', 'Postal Code', 'Country'],
+        'lease': ['Current Lease Start', 'Current Lease End'],
+    },
+    'past_2324': {
+        'csv': 'Past_resident_2324_with_distances.csv',
+        'label': ['Street Line1', 'Street Line2', 'Street Line3', 'City', 'State/Province', 'Postal Code', 'Country'],
+        'lease': ['Current Lease Start', 'Current Lease End'],
+    },
+    'past': {
+        'csv': 'Past_resident_with_distances.csv',
+        'label': ['Street Line1', 'Street Line2', 'Street Line3', 'City', 'State/Province', 'Postal Code', 'Country'],
+        'lease': ['Current Lease Start', 'Current Lease End'],
+    },
+}
+
+
+# Just the columns the map pages use, from a *_with_distances.csv; rows without coordinates are dropped
+def read_points(path: str, config: dict, ref=UNIVERSITY_COORDS) -> Dict[str, object]:
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        rows = list(reader)
+
+    # First occurrence wins (older converters duplicated the Latitude/Longitude block)
+    def column(name: Optional[str]) -> List[str]:
+        if not name or name not in headers:
+            return [''] * len(rows)
+        j = headers.index(name)
+        return [r[j].strip() if j < len(r) else '' for r in rows]
+
+    lat = to_float_array(column('Latitude'))
+    lon = to_float_array(column('Longitude'))
+    dist = to_float_array(column(DIST_HEADER))
+    # Rows geocoded before the distance column existed get it here
+    missing = np.isnan(dist)
+    dist[missing] = haversine_np(lat[missing], lon[missing], ref[0], ref[1])
+    keep = ~np.isnan(lat) & ~np.isnan(lon) & ~np.isnan(dist)
+
+    housing_raw = column(config.get('housing'))
+    housing = np.array([HOUSING_VALUES.index(h) if h in HOUSING_VALUES else 0 for h in housing_raw], dtype=np.uint8)
+    label_cols = [column(c) for c in config['label']]
+    labels = [', '.join(p for p in parts if p) for parts in zip(*label_cols)] if label_cols else [''] * len(rows)
+    lease = [[v[:10] for v in column(c)] for c in config.get('lease', [])]  # "2025-09-20 00:00:00" -> date
+
+    idx = np.flatnonzero(keep)
+    return {
+        'lat': lat[idx], 'lon': lon[idx], 'dist': dist[idx], 'housing': housing[idx],
+        'label': [labels[i] for i in idx],
+        'lease': [[col[i] for i in idx] for col in lease],
+    }
+
+
+# Bucket index per row; -1 beyond the last edge (those rows are never shown)
+def distance_buckets(dist: np.ndarray, edges: List[float] = RADIUS_BUCKETS) -> np.ndarray:
+    b = np.searchsorted(np.asarray(edges, dtype=np.float64), dist, side='right') - 1
+    b[(b < 0) | (b >= len(edges) - 1)] = -1
+    return b.astype(np.int8)
+
+
+# Rows sorted by (bucket, housing) so every facet is a contiguous [start, start + count) slice:
+# the page filters by slicing and reads sidebar counts straight from the facet table.
+def build_payload(points: Dict[str, object], edges: List[float] = RADIUS_BUCKETS) -> Dict[str, object]:
+    bucket = distance_buckets(points['dist'], edges)
+    shown = np.flatnonzero(bucket >= 0)
+    order = shown[np.lexsort((points['housing'][shown], bucket[shown]))]
+    bucket, housing = bucket[order], points['housing'][order]
+
+    n_b, n_h = len(edges) - 1, len(HOUSING_VALUES)
+    counts = np.bincount(bucket.astype(np.int64) * n_h + housing, minlength=n_b * n_h).reshape(n_b, n_h)
+    starts = np.concatenate([[0], np.cumsum(counts.ravel())[:-1]]).reshape(n_b, n_h)
+    return {
+        'n': int(len(order)),
+        'coord_scale': COORD_SCALE,
+        'dist_scale': DIST_SCALE,
+        'buckets': edges,
+        'housing_values': HOUSING_VALUES,
+        'facets': {'start': starts.tolist(), 'count': counts.tolist()},
+        'lat': np.round(points['lat'][order] * COORD_SCALE).astype(np.int32),
+        'lon': np.round(points['lon'][order] * COORD_SCALE).astype(np.int32),
+        'dist': np.round(points['dist'][order] * DIST_SCALE).astype(np.uint32),
+        'housing': housing.astype(np.uint8),
+        'label': [points['label'][i] for i in order],
+        'lease': [[col[i] for i in order] for col in points['lease']],
+    }
+
+
+# Columnar JSON: lat/lon are delta-encoded ints, which keeps the text short
+def write_json(payload: Dict[str, object], path: str) -> None:
+    doc = {k: v for k, v in payload.items() if not isinstance(v, np.ndarray)}
+    doc['encoding'] = 'json'
+    doc['lat'] = np.diff(payload['lat'], prepend=0).tolist()
+    doc['lon'] = np.diff(payload['lon'], prepend=0).tolist()
+    doc['dist'] = payload['dist'].tolist()
+    doc['housing'] = payload['housing'].tolist()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, separators=(',', ':'))
+
+
+# Typed-array binary: little-endian int32 lat, int32 lon, uint32 dist, uint8 housing, each column
+# 4-byte aligned; the JSON sidecar carries offsets, facets and the string columns
+def write_binary(payload: Dict[str, object], path: str, bin_path: str) -> None:
+    columns = []
+    offset = 0
+    with open(bin_path, 'wb') as f:
+        for name, dtype in (('lat', '<i4'), ('lon', '<i4'), ('dist', '<u4'), ('housing', 'u1')):
+            data = payload[name].astype(dtype).tobytes()
+            f.write(data)
+            pad = -len(data) % 4
+            f.write(b'\0' * pad)
+            columns.append({'name': name, 'dtype': np.dtype(dtype).name, 'offset': offset, 'length': int(payload['n'])})
+            offset += len(data) + pad
+    doc = {k: v for k, v in payload.items() if not isinstance(v, np.ndarray)}
+    doc['encoding'] = 'binary'
+    doc['bin'] = os.path.basename(bin_path)
+    doc['columns'] = columns
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, separators=(',', ':'))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Export compact map payloads (plus filter facets) from geocoded CSVs.')
+    p.add_argument('datasets', nargs='*', default=list(DATASETS), help=f"Datasets to export (default: all of {', '.join(DATASETS)})")
+    p.add_argument('--binary', action='store_true', help='Write typed-array .bin columns with a JSON sidecar')
+    p.add_argument('--out-dir', default='.', help='Directory for the payloads and the index')
+    args = p.parse_args(argv)
+
+    unknown = [d for d in args.datasets if d not in DATASETS]
+    if unknown:
+        p.error(f"unknown dataset {unknown}; choose from {', '.join(DATASETS)}")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    index_path = os.path.join(args.out_dir, INDEX_PATH)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+    for name in args.datasets:
+        config = DATASETS[name]
+        if not os.path.exists(config['csv']):
+            print(f"Skipping {name}: {config['csv']} not found", file=sys.stderr)
+            continue
+        payload = build_payload(read_points(config['csv'], config))
+        out = os.path.join(args.out_dir, f"{name}.map.json")
+        if args.binary:
+            write_binary(payload, out, os.path.join(args.out_dir, f"{name}.map.bin"))
+        else:
+            write_json(payload, out)
+        index[name] = {'payload': os.path.basename(out), 'source': config['csv'], 'n': payload['n'],
+                       'encoding': 'binary' if args.binary else 'json',
+                       'facets': payload['facets']['count']}
+        print(f"{name}: {payload['n']} points -> {out} ({os.path.getsize(out)} bytes)")
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import json
+import re
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_BEDS = 571
+PORTFOLIO = 'Portfolio'
+SEASON_START_MONTH = 8  # leasing seasons run Aug 1 .. Aug 31 of the following year
+
+
+class Window(NamedTuple):
+    name: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+    @property
+    def label(self) -> str:
+        return f"{self.start.strftime('%b %Y')} - {self.end.strftime('%b %Y')}"
+
+
+def season_window(year: int) -> Window:
+    start = pd.Timestamp(year=year, month=SEASON_START_MONTH, day=1)
+    end = start + pd.DateOffset(years=1, months=1) - pd.Timedelta(seconds=1)
+    return Window(f"{year}-{(year + 1) % 100:02d}", start, end)
+
+
+# "2024" or "2024-25" -> that leasing season; "2024-08:2025-08" or "2024-08-01:2025-08-31" -> whole months
+# from the first through the last (summaries are monthly, so windows snap to month boundaries)
+def parse_window(spec: str) -> Window:
+    spec = spec.strip()
+    m = re.fullmatch(r"(\d{4})(?:-(\d{2}))?", spec)
+    if m:
+        year = int(m.group(1))
+        if m.group(2) is not None and int(m.group(2)) != (year + 1) % 100:
+            # "2024-08" is a month, not the 2024-25 season
+            raise ValueError(f"window {spec!r}: a season is written {year} or {year}-{(year + 1) % 100:02d}; "
+                             f"for months use START:END, e.g. {spec}:{spec}")
+        return season_window(year)
+    start_s, sep, end_s = spec.partition(':')
+    if not sep:
+        raise ValueError(f"window {spec!r}: expected a season year (2024, 2024-25) or START:END")
+    start = pd.Timestamp(start_s).to_period('M').start_time
+    end = pd.Timestamp(end_s).to_period('M').end_time.floor('s')
+    if end < start:
+        raise ValueError(f"window {spec!r}: end is before start")
+    return Window(spec, start, end)
+
+
+# parse_window for argparse: its message reaches the user (argparse hides a ValueError's text)
+def window_arg(spec: str) -> Window:
+    try:
+        return parse_window(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def default_window() -> Window:
+    return season_window(2024)
+
+
+def norm_property(name: object) -> str:
+    return re.sub(r"\s+", " ", "" if pd.isna(name) else str(name)).strip().lower()
+
+
+# Additions per (property, calendar month) over every event in one groupby; windows and the portfolio
+# roll-up are then cheap slices and sums of this. Without a property column everything is property ''.
+def property_monthly(dates: pd.Series, is_renewal: pd.Series, is_new: pd.Series,
+                     properties: Optional[pd.Series] = None) -> pd.DataFrame:
+    counted = (is_renewal | is_new) & dates.notna()
+    prop = (properties[counted].fillna('').astype(str).str.strip().values if properties is not None
+            else [''] * int(counted.sum()))
+    g = pd.DataFrame({
+        'property': prop,
+        'month': dates[counted].values.astype('datetime64[M]'),
+        'renewal_added': is_renewal[counted].astype(int).values,
+        'new_added': is_new[counted].astype(int).values,
+    }).groupby(['property', 'month']).sum()
+    g['total_added'] = g['renewal_added'] + g['new_added']
+    return g
+
+
+def window_monthly(monthly: pd.DataFrame, window: Window) -> pd.DataFrame:
+    months = pd.date_range(window.start, window.end, freq='MS')
+    out = monthly.reindex(months, fill_value=0)
+    out['renewal_cum'] = out['renewal_added'].cumsum()
+    out['total_cum'] = out['total_added'].cumsum()
+    return out
+
+
+def summary_frame(monthly: pd.DataFrame, beds: Optional[int]) -> pd.DataFrame:
+    beds = beds or float('nan')  # unknown bed count -> counts only, no percentages
+    return pd.DataFrame({
+        'Month': [d.strftime('%b %Y') for d in monthly.index.to_pydatetime()],
+        'Renewal Leases': monthly['renewal_cum'].astype(int).values,
+        'Renewal %': (monthly['renewal_cum'] / beds * 100.0).round(2).values,
+        'Prelease%': (monthly['total_cum'] / beds * 100.0).round(2).values,
+    })
+
+
+# Monthly additions for one property, or summed over a list of them
+def monthly_for(pm: pd.DataFrame, prop) -> pd.DataFrame:
+    names = pm.index.get_level_values('property')
+    keep = names.isin(prop) if isinstance(prop, list) else names == prop
+    return pm[keep].groupby(level='month').sum()
+
+
+def load_beds_config(path: str) -> Dict[str, int]:
+    with open(path, encoding='utf-8') as f:
+        return {norm_property(k): int(v) for k, v in json.load(f).items()}
+
+
+# (property, beds) from a rent roll export: the property is named in the preamble and every Bldg-Unit
+# row is one bed
+def rent_roll_beds(path: str) -> Tuple[str, int]:
+    from summarize_rent_roll import load_frame, read_preamble
+    return read_preamble(path)[0], len(load_frame(path))
+
+
+# Bed count per property: config/rent-roll entries first; a lone property falls back to `default`
+def resolve_beds(properties: List[str], known: Dict[str, int], default: Optional[int]) -> Dict[str, Optional[int]]:
+    beds: Dict[str, Optional[int]] = {}
+    for prop in properties:
+        beds[prop] = known.get(norm_property(prop))
+        if beds[prop] is None and len(properties) == 1:
+            beds[prop] = default
+        if beds[prop] is None:
+            print(f"WARNING: No bed count for {prop!r}; showing counts without percentages "
+                  f"(use --beds-config or --rent-roll)", file=sys.stderr)
+    return beds
+
+
+# Monthly additions per property, plus a PORTFOLIO roll-up over the properties with known bed counts when
+# there is more than one property; beds gains the roll-up's total
+def rollup(pm: pd.DataFrame,
+           beds: Dict[str, Optional[int]]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Optional[int]]]:
+    props = list(pm.index.get_level_values('property').unique()) or ['']
+    monthly = {p: monthly_for(pm, p) for p in props}
+    if len(props) > 1:
+        rolled = [p for p in props if beds.get(p)]
+        if rolled:
+            monthly[PORTFOLIO] = monthly_for(pm, rolled)
+            beds = dict(beds, **{PORTFOLIO: sum(beds[p] for p in rolled)})
+    return monthly, beds
+
+
+# {(property, window name): summary} for every rolled-up monthly frame and window
+def summary_frames(monthly: Dict[str, pd.DataFrame], windows: List[Window],
+                   beds: Dict[str, Optional[int]]) -> Dict[Tuple[str, str], pd.DataFrame]:
+    return {(p, w.name): summary_frame(window_monthly(m, w), beds.get(p)) for p, m in monthly.items() for w in windows}
+
+
+def summarize(pm: pd.DataFrame, windows: List[Window],
+              beds: Dict[str, Optional[int]]) -> Dict[Tuple[str, str], pd.DataFrame]:
+    monthly, beds = rollup(pm, beds)
+    return summary_frames(monthly, windows, beds)
+
+
+# Smallest date range covering every window, for pre-filtering events before the groupby
+def span(windows: List[Window]):
+    return min(w.start for w in windows), max(w.end for w in windows)
+
+
+def _add_chart(writer, sheet_name: str, n_rows: int, title: str) -> None:
+    workbook = writer.book
+    worksheet = writer.sheets[sheet_name]
+    chart = workbook.add_chart({'type': 'line'})
+    last_row = n_rows + 1
+    chart.add_series({'name': 'Renewal %', 'categories': [sheet_name, 1, 0, last_row-1, 0],
+                      'values': [sheet_name, 1, 2, last_row-1, 2], 'line': {'color': '#1f77b4'}})
+    chart.add_series({'name': 'Prelease%', 'categories': [sheet_name, 1, 0, last_row-1, 0],
+                      'values': [sheet_name, 1, 3, last_row-1, 3], 'line': {'color': '#ff7f0e'}})
+    chart.set_title({'name': f"Prelease vs Renewal % ({title})"})
+    chart.set_x_axis({'name': 'Month'})
+    chart.set_y_axis({'name': 'Percent', 'major_gridlines': {'visible': True}})
+    chart.set_legend({'position': 'bottom'})
+    worksheet.insert_chart('F2', chart, {'x_scale': 1.3, 'y_scale': 1.3})
+
+
+# One property and window: the familiar Month/Renewal/Prelease table. Otherwise one CSV with leading
+# Property and/or Window columns and one Excel sheet (and chart) per summary.
+def write_outputs(summaries: Dict[Tuple[str, str], pd.DataFrame], windows: List[Window], output_csv: str,
+                  output_xlsx: str) -> None:
+    multi_prop = len({p for p, _ in summaries}) > 1
+    multi_window = len({w for _, w in summaries}) > 1
+    keys = (['Property'] if multi_prop else []) + (['Window'] if multi_window else [])
+
+    def key_values(key: Tuple[str, str]) -> List[str]:
+        return ([key[0]] if multi_prop else []) + ([key[1]] if multi_window else [])
+
+    if not keys:
+        combined = next(iter(summaries.values()))
+    else:
+        combined = pd.concat([s.assign(**dict(zip(keys, key_values(k)))) for k, s in summaries.items()],
+                             ignore_index=True)
+        combined = combined[keys + [c for c in combined.columns if c not in keys]]
+    try:
+        combined.to_csv(output_csv, index=False)
+    except Exception as e:
+        print(f"ERROR: Failed to write CSV: {e}", file=sys.stderr)
+
+    labels = {w.name: w.label for w in windows}
+    sheet_names = {k: re.sub(r'[\[\]:*?/\\]', '_', ' '.join(key_values(k)))[:31] or 'Summary' for k in summaries}
+    titles = {k: ' '.join(([k[0]] if multi_prop else []) + [labels.get(k[1], k[1])]) for k in summaries}
+    wrote_chart = False
+    try:
+        with pd.ExcelWriter(output_xlsx, engine='xlsxwriter') as writer:
+            for k, summary in summaries.items():
+                summary.to_excel(writer, sheet_name=sheet_names[k], index=False)
+                _add_chart(writer, sheet_names[k], len(summary), titles[k])
+            wrote_chart = True
+    except Exception:
+        try:
+            with pd.ExcelWriter(output_xlsx, engine='openpyxl') as writer:
+                for k, summary in summaries.items():
+                    summary.to_excel(writer, sheet_name=sheet_names[k], index=False)
+        except Exception as e2:
+            print(f"ERROR: Failed to write Excel: {e2}", file=sys.stderr)
+    print(f"\nOutput CSV: {output_csv}")
+    print(f"Output Excel: {output_xlsx}{' (with chart)' if wrote_chart else ''}")
+
+
+def print_summaries(summaries: Dict[Tuple[str, str], pd.DataFrame], windows: List[Window], suffix: str = '') -> None:
+    labels = {w.name: w.label for w in windows}
+    multi_prop = len({p for p, _ in summaries}) > 1
+    for (prop, window), summary in summaries.items():
+        print(f"\nSummary ({(prop + ', ') if multi_prop else ''}{labels.get(window, window)}){suffix}")
+        print(summary.to_string(index=False))
+
+
+def filter_property(df: pd.DataFrame, prop: Optional[str], column: str = 'property') -> pd.DataFrame:
+    if not prop:
+        return df
+    if column not in df.columns:
+        print(f"WARNING: No '{column}' column; --property {prop!r} ignored", file=sys.stderr)
+        return df
+    return df[df[column].fillna('').astype(str).str.strip().str.lower() == prop.strip().lower()]
+
+
+def add_common_args(p, default_csv: str, default_xlsx: str) -> None:
+    p.add_argument('--window', action='append', type=window_arg, default=[],
+                   help='Analysis window, repeatable: a season year ("2024" = Aug 2024 - Aug 2025) or '
+                        'START:END months/dates (default: 2024)')
+    p.add_argument('--beds', type=int, default=DEFAULT_BEDS,
+                   help=f"Bed count when only one property is analyzed and none is configured (default: {DEFAULT_BEDS})")
+    p.add_argument('--property', help='Only count leases for this property (matched on the Property column); '
+                                      'default: every property plus a portfolio roll-up')
+    p.add_argument('--beds-config', help='JSON file of {"Property name": beds}')
+    p.add_argument('--rent-roll', action='append', default=[],
+                   help='Rent roll export(s) to take a property\'s bed count from (one bed per Bldg-Unit row)')
+    p.add_argument('--output-csv', default=default_csv)
+    p.add_argument('--output-xlsx', default=default_xlsx)
+
+
+def known_beds(args) -> Dict[str, int]:
+    known = load_beds_config(args.beds_config) if args.beds_config else {}
+    for path in args.rent_roll:
+        name, beds = rent_roll_beds(path)
+        known[norm_property(name)] = beds
+        print(f"{path}: {name} has {beds} beds")
+    return known
@@ -0,0 +1,181 @@
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+STATE_PATH = os.environ.get('PRELEASE_STATE_PATH', 'prelease_state.sqlite')
+LEASE_KEY_COLUMNS = ['bldg-unit', 'lease start']
+
+
+# Stable lease identity across exports: property + Bldg-Unit + Lease Start
+def lease_ids(df: pd.DataFrame, properties: Optional[pd.Series] = None) -> pd.Series:
+    missing = [c for c in LEASE_KEY_COLUMNS if c not in df.columns]
+    if missing:
+        raise KeyError(f"lease id columns not found: {missing}")
+    prop = properties.fillna('').astype(str).str.strip() if properties is not None else ''
+    return prop + '|' + df['bldg-unit'].fillna('').astype(str).str.strip() + '|' + \
+        df['lease start'].fillna('').astype(str).str.strip()
+
+
+# Counted leases in the shape the store keeps: index lease_id, columns property/month/renewal/new. Ids may
+# repeat; unique_leases settles that once every chunk of an export is in
+def counted_leases(ids: pd.Series, dates: pd.Series, is_renewal: pd.Series, is_new: pd.Series,
+                   properties: Optional[pd.Series] = None) -> pd.DataFrame:
+    counted = (is_renewal | is_new) & dates.notna()
+    return pd.DataFrame({
+        'property': properties[counted].fillna('').astype(str).str.strip().values if properties is not None else '',
+        'month': dates[counted].dt.strftime('%Y-%m').values,
+        'renewal': is_renewal[counted].astype(int).values,
+        'new': is_new[counted].astype(int).values,
+    }, index=pd.Index(ids[counted].values, name='lease_id'))
+
+
+# One row per lease id, the last one in file order winning
+def unique_leases(leases: pd.DataFrame) -> pd.DataFrame:
+    dupes = leases.index.duplicated(keep='last')
+    if dupes.any():
+        print(f"WARNING: {int(dupes.sum())} duplicate lease ids in the export; keeping the last row of each",
+              file=sys.stderr)
+    return leases[~dupes]
+
+
+# Per-(property, month) counters plus the set of leases already counted. Applying a new export touches
+# only leases that are new, changed or gone, and every applied delta is kept as dated history.
+class PreleaseState:
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            ' lease_id TEXT PRIMARY KEY, property TEXT NOT NULL, month TEXT NOT NULL,'
+            ' renewal INTEGER NOT NULL, new INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS counters ('
+            ' property TEXT NOT NULL, month TEXT NOT NULL, renewal INTEGER NOT NULL, new INTEGER NOT NULL,'
+            ' PRIMARY KEY (property, month));'
+            'CREATE TABLE IF NOT EXISTS history ('
+            ' as_of TEXT NOT NULL, property TEXT NOT NULL, month TEXT NOT NULL,'
+            ' renewal INTEGER NOT NULL, new INTEGER NOT NULL, PRIMARY KEY (as_of, property, month));'
+            'CREATE TABLE IF NOT EXISTS runs ('
+            ' ran_at TEXT NOT NULL, as_of TEXT NOT NULL, source TEXT,'
+            ' added INTEGER NOT NULL, changed INTEGER NOT NULL, removed INTEGER NOT NULL);'
+            'CREATE INDEX IF NOT EXISTS leases_property ON leases (lower(trim(property)));'
+            # Staging table for the export being applied
+            'CREATE TEMP TABLE IF NOT EXISTS cur ('
+            ' lease_id TEXT PRIMARY KEY, property TEXT NOT NULL, month TEXT NOT NULL,'
+            ' renewal INTEGER NOT NULL, new INTEGER NOT NULL);'
+        )
+        self.conn.commit()
+
+    def leases(self) -> pd.DataFrame:
+        return pd.read_sql_query('SELECT lease_id, property, month, renewal, new FROM leases', self.conn,
+                                 index_col='lease_id')
+
+    # Diff a full export's counted leases against the store and apply only the difference. scope limits
+    # the diff to one property, for exports filtered to it (other properties stay untouched).
+    # The export is staged in a temp table and diffed by primary key in SQL, so the stored history is
+    # never loaded into memory; only the per-(property, month) net change comes back.
+    # Deltas are taken against the newest state, so an export older than the last applied one is refused
+    # (its delta would land out of order in the history).
+    def apply(self, current: pd.DataFrame, as_of: Optional[str] = None, source: str = '',
+              scope: Optional[str] = None) -> Dict[str, int]:
+        as_of = pd.Timestamp(as_of).date().isoformat() if as_of else date.today().isoformat()
+        latest = self.conn.execute('SELECT MAX(as_of) FROM runs').fetchone()[0]
+        if latest is not None and as_of < latest:
+            raise ValueError(f"export as of {as_of} is older than the last one applied ({latest}); "
+                             f"apply exports in date order")
+        params = {'scope': scope.strip().lower() if scope else None}
+        in_scope = '(:scope IS NULL OR lower(trim(l.property)) = :scope)'
+        differs = '(c.property <> l.property OR c.month <> l.month OR c.renewal <> l.renewal OR c.new <> l.new)'
+        added = 'FROM cur c LEFT JOIN leases l USING (lease_id) WHERE l.lease_id IS NULL'
+        changed = f'FROM cur c JOIN leases l USING (lease_id) WHERE {differs}'
+        removed = f'FROM leases l LEFT JOIN cur c USING (lease_id) WHERE c.lease_id IS NULL AND {in_scope}'
+
+        with self.conn:
+            self.conn.execute('DELETE FROM cur')
+            self.conn.executemany(
+                'INSERT INTO cur (lease_id, property, month, renewal, new) VALUES (?, ?, ?, ?, ?)',
+                zip(current.index, current['property'], current['month'],
+                    current['renewal'].astype(int).tolist(), current['new'].astype(int).tolist()))
+            counts = {name: self.conn.execute(f'SELECT COUNT(*) {sql}', params).fetchone()[0]
+                      for name, sql in (('added', added), ('changed', changed), ('removed', removed))}
+
+            # Old contributions come out, new ones go in; net per (property, month)
+            rows = self.conn.execute(
+                'SELECT property, month, SUM(renewal), SUM(new) FROM ('
+                f' SELECT c.property, c.month, c.renewal, c.new {added}'
+                f' UNION ALL SELECT c.property, c.month, c.renewal, c.new {changed}'
+                f' UNION ALL SELECT l.property, l.month, -l.renewal, -l.new {changed}'
+                f' UNION ALL SELECT l.property, l.month, -l.renewal, -l.new {removed}'
+                ') GROUP BY property, month HAVING SUM(renewal) <> 0 OR SUM(new) <> 0', params).fetchall()
+
+            self.conn.execute(f'DELETE FROM leases WHERE lease_id IN (SELECT l.lease_id {removed})', params)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO leases (lease_id, property, month, renewal, new) '
+                f'SELECT c.lease_id, c.property, c.month, c.renewal, c.new {added} '
+                f'UNION ALL SELECT c.lease_id, c.property, c.month, c.renewal, c.new {changed}')
+            self.conn.executemany(
+                'INSERT INTO counters (property, month, renewal, new) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (property, month) DO UPDATE SET '
+                'renewal = renewal + excluded.renewal, new = new + excluded.new', rows)
+            self.conn.executemany(
+                'INSERT INTO history (as_of, property, month, renewal, new) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (as_of, property, month) DO UPDATE SET '
+                'renewal = renewal + excluded.renewal, new = new + excluded.new',
+                [(as_of,) + tuple(r) for r in rows])
+            self.conn.execute(
+                'INSERT INTO runs (ran_at, as_of, source, added, changed, removed) VALUES (?, ?, ?, ?, ?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), as_of, source, counts['added'], counts['changed'],
+                 counts['removed']))
+            self.conn.execute('DELETE FROM cur')
+        return dict(counts, cells=len(rows))
+
+    # Counters in prelease_engine.property_monthly's shape, so summaries come straight from the store
+    def property_monthly(self, prop: Optional[str] = None) -> pd.DataFrame:
+        df = pd.read_sql_query('SELECT property, month, renewal AS renewal_added, new AS new_added FROM counters',
+                               self.conn)
+        if prop:
+            df = df[df['property'].str.strip().str.lower() == prop.strip().lower()]
+        df['month'] = pd.to_datetime(df['month'], format='%Y-%m')
+        df = df.set_index(['property', 'month']).sort_index()
+        df['total_added'] = df['renewal_added'] + df['new_added']
+        return df
+
+    # Counted leases per property as of each applied export
+    def history(self, prop: Optional[str] = None) -> pd.DataFrame:
+        df = pd.read_sql_query('SELECT as_of, property, SUM(renewal) AS renewal, SUM(new) AS new FROM history '
+                               'GROUP BY as_of, property ORDER BY property, as_of', self.conn)
+        if prop is not None:
+            df = df[df['property'].str.lower() == prop.strip().lower()]
+        df[['renewal', 'new']] = df.groupby('property')[['renewal', 'new']].cumsum()
+        df['total'] = df['renewal'] + df['new']
+        return df.reset_index(drop=True)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Day-by-day prelease counts from the incremental state store.')
+    p.add_argument('--state', default=STATE_PATH)
+    p.add_argument('--property', help='Only this property')
+    p.add_argument('--output', help='Write the history to this CSV instead of stdout')
+    args = p.parse_args(argv)
+    if not os.path.exists(args.state):
+        print(f"ERROR: State store not found: {args.state}", file=sys.stderr)
+        sys.exit(1)
+    state = PreleaseState(args.state)
+    hist = state.history(args.property)
+    state.close()
+    if args.output:
+        hist.to_csv(args.output, index=False)
+        print(f"Wrote {len(hist)} rows to {args.output}")
+    else:
+        print(hist.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
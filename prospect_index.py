@@ -0,0 +1,148 @@
+import argparse
+import csv
+import os
+import sys
+from math import cos, radians
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geo_distance import HISTORICAL_CSVS, haversine_np, parse_point, to_float_array
+
+CELL_DEG = 0.1  # ~7 mi of latitude per grid cell
+MI_PER_DEG_LAT = 69.0
+LABEL_HEADERS = ['Street 1', 'Street Line1', 'City', 'State', 'State/Province', 'ZipCode', 'Postal Code']
+
+
+# Uniform lat/lon grid over the geocoded prospects. Points are sorted by cell key so every cell is a
+# contiguous slice; a query only touches the cells its search box overlaps, not every row.
+class ProspectIndex:
+    def __init__(self, lat: Sequence[float], lon: Sequence[float], records: Optional[List[dict]] = None,
+                 cell_deg: float = CELL_DEG):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        keep = ~np.isnan(lat) & ~np.isnan(lon)
+        self.cell_deg = cell_deg
+        self.ncols = int(np.ceil(360 / cell_deg)) + 1
+        ci, cj = self._cells(lat[keep], lon[keep])
+        keys = self._key(ci, cj)
+        order = np.argsort(keys, kind='stable')
+        self.lat = lat[keep][order]
+        self.lon = lon[keep][order]
+        self.keys = keys[order]
+        src = np.flatnonzero(keep)[order]
+        self.records = [records[i] for i in src] if records is not None else None
+        self.ci_range = (int(ci.min()), int(ci.max())) if len(ci) else (0, -1)
+        self.cj_range = (int(cj.min()), int(cj.max())) if len(cj) else (0, -1)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _cells(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64),
+                np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64))
+
+    def _key(self, ci, cj):
+        return np.asarray(ci, dtype=np.int64) * self.ncols + np.asarray(cj, dtype=np.int64)
+
+    # Row positions of every point in the block of cells [i0..i1] x [j0..j1]
+    def _block(self, i0: int, i1: int, j0: int, j1: int) -> np.ndarray:
+        i0, i1 = max(i0, self.ci_range[0]), min(i1, self.ci_range[1])
+        j0, j1 = max(j0, self.cj_range[0]), min(j1, self.cj_range[1])
+        if i0 > i1 or j0 > j1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(i0, i1 + 1)
+        lo = np.searchsorted(self.keys, self._key(rows, j0), side='left')
+        hi = np.searchsorted(self.keys, self._key(rows, j1), side='right')
+        return np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)]) if len(rows) else np.empty(0, dtype=np.int64)
+
+    # All points within radius_mi of (lat, lon), nearest first
+    def within(self, lat: float, lon: float, radius_mi: float) -> Tuple[np.ndarray, np.ndarray]:
+        dlat = radius_mi / MI_PER_DEG_LAT
+        dlon = radius_mi / (MI_PER_DEG_LAT * max(cos(radians(min(abs(lat) + dlat, 89.9))), 1e-6))
+        (i0, i1), (j0, j1) = (self._cells([lat - dlat, lat + dlat], [lon - dlon, lon + dlon]))
+        cand = self._block(int(i0), int(i1), int(j0), int(j1))
+        dist = haversine_np(self.lat[cand], self.lon[cand], lat, lon)
+        hit = dist <= radius_mi
+        order = np.argsort(dist[hit], kind='stable')
+        return cand[hit][order], dist[hit][order]
+
+    # k nearest points to (lat, lon): grow the searched ring of cells until the k-th candidate
+    # is closer than anything outside the ring can be
+    def nearest(self, lat: float, lon: float, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        ci, cj = (int(v[0]) for v in self._cells([lat], [lon]))
+        max_ring = max(ci - self.ci_range[0], self.ci_range[1] - ci, cj - self.cj_range[0], self.cj_range[1] - cj, 0)
+        for ring in range(max_ring + 1):
+            cand = self._block(ci - ring, ci + ring, cj - ring, cj + ring)
+            if len(cand) < k and ring < max_ring:
+                continue
+            dist = haversine_np(self.lat[cand], self.lon[cand], lat, lon)
+            part = np.argpartition(dist, k - 1)[:k] if len(cand) > k else np.arange(len(cand))
+            kth = dist[part].max()
+            edge_deg = ring * self.cell_deg
+            safe_mi = edge_deg * MI_PER_DEG_LAT * cos(radians(min(abs(lat) + edge_deg + self.cell_deg, 89.9)))
+            if kth <= safe_mi or ring == max_ring:
+                order = part[np.argsort(dist[part], kind='stable')]
+                return cand[order], dist[order]
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    @classmethod
+    def from_csvs(cls, paths: Sequence[str], cell_deg: float = CELL_DEG) -> 'ProspectIndex':
+        lat: List = []
+        lon: List = []
+        records: List[dict] = []
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"Skipping {path}: not found", file=sys.stderr)
+                continue
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                headers = next(reader)
+                if 'Latitude' not in headers:
+                    continue
+                # First occurrence wins (older converters duplicated the Latitude/Longitude block)
+                lat_i, lon_i = headers.index('Latitude'), headers.index('Longitude')
+                label_i = [headers.index(h) for h in LABEL_HEADERS if h in headers]
+                for n, row in enumerate(reader, 2):
+                    if len(row) <= max(lat_i, lon_i):
+                        continue
+                    lat.append(row[lat_i])
+                    lon.append(row[lon_i])
+                    label = ', '.join(row[i] for i in label_i if i < len(row) and row[i])
+                    records.append({'dataset': os.path.basename(path), 'row': n, 'label': label})
+        return cls(to_float_array(lat), to_float_array(lon), records, cell_deg)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Radius and nearest-neighbour queries over geocoded prospect CSVs.')
+    p.add_argument('csvs', nargs='*', default=HISTORICAL_CSVS)
+    p.add_argument('--point', type=parse_point, required=True, help='Query point as "lat,lon"')
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument('--radius', type=float, help='Return every prospect within this many miles')
+    group.add_argument('--k', type=int, help='Return the k nearest prospects')
+    p.add_argument('--output', help='Write matches to this CSV instead of stdout')
+    args = p.parse_args(argv)
+
+    index = ProspectIndex.from_csvs(args.csvs)
+    lat, lon = args.point
+    if args.radius is not None:
+        idx, dist = index.within(lat, lon, args.radius)
+    else:
+        idx, dist = index.nearest(lat, lon, args.k)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(['Dataset', 'Row', 'Label', 'Latitude', 'Longitude', 'Distance (mi)'])
+    for i, d in zip(idx, dist):
+        r = index.records[i]
+        writer.writerow([r['dataset'], r['row'], r['label'], index.lat[i], index.lon[i], round(float(d), 2)])
+    if args.output:
+        out.close()
+        print(f"Wrote {len(idx)} prospects to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
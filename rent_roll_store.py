@@ -0,0 +1,188 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+from summarize_rent_roll import aggregate, load_rent_rolls
+
+STORE_DIR = os.environ.get('RENT_ROLL_STORE', 'rent_roll_store')
+METRICS = {
+    'vacancy': 'Vacancy %',
+    'market_rent': 'Avg market rent',
+    'scheduled_rent': 'Avg scheduled rent',
+}
+
+
+# Property key for matching: case and runs of whitespace don't distinguish properties
+def norm_name(name: str) -> str:
+    return ' '.join(str(name).split()).lower()
+
+
+# Append-only history of rent roll snapshots, one per (property, as-of date from the preamble). Each
+# snapshot's unit rows are kept as a Parquet file; its per-floorplan aggregates go into an SQLite index
+# that trend queries read without touching the raw rows or the original CSVs.
+class RentRollStore:
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, 'units'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, 'index.sqlite'))
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS snapshots ('
+            ' property TEXT NOT NULL, as_of TEXT NOT NULL, source TEXT, units_file TEXT NOT NULL,'
+            ' loaded_at TEXT NOT NULL, PRIMARY KEY (property, as_of));'
+            'CREATE TABLE IF NOT EXISTS floorplans ('
+            ' property TEXT NOT NULL, as_of TEXT NOT NULL, floorplan TEXT NOT NULL, units INTEGER NOT NULL,'
+            ' vacant INTEGER NOT NULL, market_rent_sum REAL NOT NULL, scheduled_rent_sum REAL NOT NULL,'
+            ' PRIMARY KEY (property, as_of, floorplan));'
+        )
+        self.conn.commit()
+
+    def snapshots(self, prop: Optional[str] = None) -> pd.DataFrame:
+        df = pd.read_sql_query('SELECT property, as_of, source, loaded_at FROM snapshots ORDER BY property, as_of',
+                               self.conn)
+        return df if prop is None else df[df['property'].map(norm_name) == norm_name(prop)]
+
+    # Store every snapshot in `paths` (files and directories) not already held; returns the files added.
+    # Property names are matched case- and whitespace-insensitively and stored in the first spelling seen,
+    # so one property is one name in the store.
+    def add(self, paths: List[str]) -> List[str]:
+        df = load_rent_rolls(paths)
+        if df.empty:
+            return []
+        stored = self.snapshots()
+        names = {norm_name(p): p for p in stored['property']}
+        held = {(norm_name(p), a) for p, a in zip(stored['property'], stored['as_of'])}
+        snaps = df.drop_duplicates('Source')[['Source', 'Property', 'As Of']]
+        new = []
+        for source, prop, as_of in snaps.itertuples(index=False):
+            if not prop or as_of is None:
+                print(f"Skipping {source}: no property name or as-of date in its preamble", file=sys.stderr)
+            elif (norm_name(prop), as_of.isoformat()) in held:
+                print(f"Skipping {source}: {prop} as of {as_of} is already stored", file=sys.stderr)
+            else:
+                held.add((norm_name(prop), as_of.isoformat()))
+                names.setdefault(norm_name(prop), ' '.join(prop.split()))
+                new.append(source)
+        if not new:
+            return []
+
+        df = df[df['Source'].isin(new)]
+        per_fp = aggregate(df, ['Source', 'Unit Type']).reset_index()
+        key = snaps.set_index('Source')
+        loaded_at = datetime.now().isoformat(timespec='seconds')
+        # Rows go in first; each unit file is written under a temporary name inside the transaction and only
+        # renamed into place once it has committed, so a failed load leaves neither rows nor files behind
+        pending = []
+        try:
+            with self.conn:
+                for source in new:
+                    prop, as_of = names[norm_name(key.at[source, 'Property'])], key.at[source, 'As Of'].isoformat()
+                    units_file = os.path.join('units', f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', prop)}__{as_of}.parquet")
+                    self.conn.execute(
+                        'INSERT INTO snapshots (property, as_of, source, units_file, loaded_at) VALUES (?, ?, ?, ?, ?)',
+                        (prop, as_of, os.path.basename(source), units_file, loaded_at))
+                    rows = per_fp[per_fp['Source'] == source]
+                    self.conn.executemany(
+                        'INSERT INTO floorplans (property, as_of, floorplan, units, vacant, market_rent_sum, '
+                        'scheduled_rent_sum) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [(prop, as_of, fp, int(n), int(v), float(mr), float(sch)) for fp, n, v, mr, sch in zip(
+                            rows['Unit Type'], rows['Units'], rows['Vacant'], rows['MarketRent_Sum'],
+                            rows['ScheduledRent_Sum'])])
+                    path = os.path.join(self.root, units_file)
+                    pending.append((path + '.tmp', path))
+                    df[df['Source'] == source].drop(columns=['Source', 'Property', 'As Of']) \
+                        .to_parquet(path + '.tmp', index=False)
+        except BaseException:
+            for tmp, _ in pending:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            raise
+        for tmp, path in pending:
+            os.replace(tmp, path)
+        return new
+
+    # One snapshot's unit rows, as loaded
+    def units(self, prop: str, as_of: str) -> pd.DataFrame:
+        row = self.conn.execute('SELECT units_file FROM snapshots WHERE lower(property) = ? AND as_of = ?',
+                                (norm_name(prop), as_of)).fetchone()
+        if row is None:
+            raise KeyError(f"no snapshot for {prop!r} as of {as_of}")
+        return pd.read_parquet(os.path.join(self.root, row[0]))
+
+    # A metric per floorplan (plus TOTAL) over each property's last `last` snapshots, from the aggregate
+    # index alone: a row per (property, as_of), a column per floorplan
+    def trend(self, metric: str = 'vacancy', prop: Optional[str] = None, floorplan: Optional[str] = None,
+              last: int = 12) -> pd.DataFrame:
+        if metric not in METRICS:
+            raise ValueError(f"unknown metric {metric!r}; choose from {', '.join(METRICS)}")
+        df = pd.read_sql_query(
+            'SELECT f.* FROM floorplans f JOIN ('
+            ' SELECT property, as_of, ROW_NUMBER() OVER (PARTITION BY property ORDER BY as_of DESC) AS n'
+            ' FROM snapshots) s ON s.property = f.property AND s.as_of = f.as_of WHERE s.n <= ?',
+            self.conn, params=(last,))
+        if prop:
+            df = df[df['property'].map(norm_name) == norm_name(prop)]
+        if floorplan:
+            df = df[df['floorplan'].str.lower().str.contains(floorplan.strip().lower(), regex=False)]
+        if df.empty:
+            return pd.DataFrame()
+        total = df.groupby(['property', 'as_of'], as_index=False)[
+            ['units', 'vacant', 'market_rent_sum', 'scheduled_rent_sum']].sum().assign(floorplan='TOTAL')
+        df = pd.concat([df, total], ignore_index=True)
+        value = {
+            'vacancy': df['vacant'] / df['units'] * 100.0,
+            'market_rent': df['market_rent_sum'] / df['units'],
+            'scheduled_rent': df['scheduled_rent_sum'] / (df['units'] - df['vacant']).where(lambda n: n > 0),
+        }[metric]
+        out = df.assign(value=value.round(2)).pivot_table(index=['property', 'as_of'], columns='floorplan',
+                                                          values='value', sort=True)
+        out = out[[c for c in out.columns if c != 'TOTAL'] + ['TOTAL']]
+        out.columns.name = None
+        return out.reset_index()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Rent roll snapshot store: load exports, query occupancy and rent trends.')
+    p.add_argument('--store', default=STORE_DIR)
+    sub = p.add_subparsers(dest='command', required=True)
+    load = sub.add_parser('load', help='Add rent roll snapshots (files or directories); known ones are skipped')
+    load.add_argument('paths', nargs='+')
+    sub.add_parser('list', help='Stored snapshots')
+    trend = sub.add_parser('trend', help='A metric by floorplan over the last N snapshots')
+    trend.add_argument('--metric', choices=list(METRICS), default='vacancy',
+                       help='vacancy: vacant units %%; market_rent: per unit; scheduled_rent: per occupied unit')
+    trend.add_argument('--property', help='Only this property')
+    trend.add_argument('--floorplan', help='Only floorplans containing this text')
+    trend.add_argument('--last', type=int, default=12, help='Snapshots per property (default: 12)')
+    trend.add_argument('--output', help='Write the trend to this CSV instead of stdout')
+    args = p.parse_args(argv)
+
+    store = RentRollStore(args.store)
+    if args.command == 'load':
+        added = store.add(args.paths)
+        print(f"Stored {len(added)} snapshot(s) in {args.store}")
+    elif args.command == 'list':
+        print(store.snapshots().to_string(index=False))
+    else:
+        out = store.trend(args.metric, args.property, args.floorplan, args.last)
+        if out.empty:
+            print("No stored snapshots match.", file=sys.stderr)
+        elif args.output:
+            out.to_csv(args.output, index=False)
+            print(f"Wrote {len(out)} rows to {args.output}")
+        else:
+            print(f"{METRICS[args.metric]} by floorplan")
+            print(out.to_string(index=False))
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
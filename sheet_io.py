@@ -0,0 +1,105 @@
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import openpyxl
+
+# Known export layouts: the columns that identify the header row, and the address parts in order
+LAYOUTS = {
+    'admit': {
+        'must_have': ['Street 1', 'City', 'State', 'ZipCode'],
+        'parts': ['Street 1', 'Street 2', 'City', 'State', 'ZipCode'],
+        'country': None,
+    },
+    'resident': {
+        'must_have': ['Street Line1', 'City', 'State/Province', 'Postal Code'],
+        'parts': ['Street Line1', 'Street Line2', 'Street Line3', 'City', 'State/Province', 'Postal Code'],
+        'country': 'Country',
+    },
+}
+
+Sheet = Tuple[Optional[dict], int, list, List[tuple], List[tuple]]
+
+
+def header_matches(row: Sequence, must_have: List[str]) -> bool:
+    return bool(row) and all(h in row for h in must_have)
+
+
+def pad(values: Sequence, width: int) -> list:
+    values = list(values)[:width]
+    return values + [None] * (width - len(values))
+
+
+# Single streaming pass over a read-only sheet: finds the header row for the first matching candidate
+# and returns (candidate, header_row_idx, headers, preamble rows, data rows) as plain value tuples.
+# candidates=None tries the known LAYOUTS; an empty list takes the first non-empty row as the header.
+def read_sheet(in_path: str, candidates: Optional[List[dict]] = None, sheet: Optional[str] = None) -> Sheet:
+    if candidates is None:
+        candidates = list(LAYOUTS.values())
+    wb = openpyxl.load_workbook(in_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        ws.reset_dimensions()  # exports often carry a stale <dimension>; read to the real end
+        found, layout, header_row_idx, headers = False, None, 0, []
+        preamble: List[tuple] = []
+        data: List[tuple] = []
+        for row_idx, row in enumerate(ws.iter_rows(values_only=True), 1):
+            if found:
+                data.append(row)
+                continue
+            if candidates:
+                layout = next((c for c in candidates if header_matches(row, c['must_have'])), None)
+                found = layout is not None
+            else:
+                found = any(v is not None and v != '' for v in row)
+            if found:
+                header_row_idx, headers = row_idx, list(row)
+            else:
+                preamble.append(row)
+    finally:
+        wb.close()
+    if not found:
+        raise Exception(f"{in_path}: header row with required columns not found. Known layouts: " + ', '.join(LAYOUTS))
+    # Drop trailing empty header cells that read-only mode reports for formatted columns
+    while headers and headers[-1] is None:
+        headers.pop()
+    return layout, header_row_idx, headers, preamble, data
+
+
+def sheet_names(in_path: str) -> List[str]:
+    wb = openpyxl.load_workbook(in_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+# Columnar writers go through pandas/pyarrow when available
+def write_columnar(path: str, headers: list, rows: List[list], fmt: str = 'parquet') -> bool:
+    try:
+        import pandas as pd
+    except ModuleNotFoundError:
+        print("ERROR: pandas is not installed. Run: python -m pip install pandas pyarrow", file=sys.stderr)
+        return False
+    names: List[str] = []
+    for j, h in enumerate(headers):
+        name = str(h) if h is not None else f"Unnamed: {j}"
+        names.append(name if name not in names else f"{name}.{j}")
+    df = pd.DataFrame([pad(r, len(names)) for r in rows], columns=names).replace('', None)
+    for c in df.columns:
+        if df[c].dtype != object:
+            continue
+        num = pd.to_numeric(df[c], errors='coerce')
+        if num.notna().sum() == df[c].notna().sum():
+            df[c] = num
+        else:
+            # Exports mix ints, strings and dates in one column; keep them as text
+            df[c] = df[c].map(lambda v: None if v is None else str(v)).astype('string')
+    try:
+        if fmt == 'feather':
+            df.to_feather(path)
+        else:
+            df.to_parquet(path, index=False)
+    except Exception as e:
+        print(f"ERROR: Failed to write {fmt} (is pyarrow installed?): {e}", file=sys.stderr)
+        return False
+    return True
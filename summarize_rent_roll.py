@@ -1,83 +1,109 @@
-import sys
+import argparse
 import csv
-from collections import defaultdict
-
-def parse_money(s: str) -> float:
-    if s is None:
-        return 0.0
-    s = str(s).strip()
-    if not s:
-        return 0.0
-    neg = False
-    if s.startswith('(') and s.endswith(')'):
-        neg = True
-        s = s[1:-1]
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from date_parse import parse_date_value
+
+DEFAULT_PATH = 'Rent Roll (4)(Meridian On Main).csv'
+HEADER_PREFIX = 'Bldg-Unit,Unit Type'
+SUMMARY_COLUMNS = ['Units', 'Vacant', 'Vacancy%', 'MarketRent_Sum', 'ScheduledRent_Sum']
+
+
+# Money cells as floats: "1,385.00 ", "$950", "(15.00)" -> -15.0; blanks and junk -> 0.0
+def parse_money(values: pd.Series) -> pd.Series:
+    s = values.fillna('').astype(str).str.strip()
+    neg = s.str.startswith('(') & s.str.endswith(')')
+    s = s.where(~neg, s.str[1:-1])
     # remove currency formatting
-    s = s.replace(',', '').replace(' ', '').replace('$', '')
-    try:
-        val = float(s)
-    except Exception:
-        val = 0.0
-    return -val if neg else val
+    s = s.str.replace(r"[,\s$]", '', regex=True)
+    val = pd.to_numeric(s, errors='coerce').fillna(0.0)
+    return val.where(~neg, -val)
 
 
-def load_rows(path: str):
-    # Read file and find header row that starts with the actual CSV headers
+# First cell of each line above the unit table, and that table's header line number
+def _preamble(path: str) -> Tuple[List[str], int]:
+    cells = []
     with open(path, 'r', encoding='utf-8-sig', newline='') as f:
-        lines = f.read().splitlines()
-    header_idx = None
-    for i, line in enumerate(lines):
-        if line.startswith('Bldg-Unit,Unit Type'):
-            header_idx = i
-            break
-    if header_idx is None:
-        raise RuntimeError('Could not locate header row starting with "Bldg-Unit,Unit Type"')
-    reader = csv.DictReader(lines[header_idx:])
-    rows = []
-    for r in reader:
-        b = (r.get('Bldg-Unit') or '').strip()
-        if not b or 'Total' in b:
+        for i, line in enumerate(f):
+            if line.startswith(HEADER_PREFIX):
+                return cells, i
+            cells.append(next(csv.reader([line]), [''])[0].strip() if line.strip() else '')
+    raise RuntimeError(f'Could not locate header row starting with "{HEADER_PREFIX}"')
+
+
+# (property, as-of date) from the lines above the unit table: "Rent Roll" / property name / report date
+def read_preamble(path: str):
+    cells, _ = _preamble(path)
+    name, as_of = '', None
+    for cell in cells[1:]:
+        when = parse_date_value(cell) if cell else None
+        if when is not None:
+            as_of = as_of or when.date()
+        elif cell and not name:
+            name = cell
+    return name, as_of
+
+
+# The unit table as a frame of strings, one row per bed (blank and Total rows dropped), plus MR/SCH floats
+def load_frame(path: str) -> pd.DataFrame:
+    _, header_idx = _preamble(path)
+    df = pd.read_csv(path, skiprows=header_idx, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    unit = df['Bldg-Unit'].str.strip()
+    df = df[(unit != '') & ~unit.str.contains('Total', regex=False)].reset_index(drop=True)
+    blank = pd.Series('', index=df.index)
+    df['MR'] = parse_money(df.get('Market Rent', blank))
+    df['SCH'] = parse_money(df.get('Scheduled Charges', blank))
+    return df
+
+
+# Every rent roll among `paths` (directories contribute their .csv files) in one frame, tagged with
+# Source, Property and As Of; files without a unit table are skipped with a warning
+def load_rent_rolls(paths: List[str]) -> pd.DataFrame:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, n) for n in os.listdir(path) if n.lower().endswith('.csv'))
+        else:
+            files.append(path)
+    frames = []
+    for path in files:
+        try:
+            df = load_frame(path)
+            name, as_of = read_preamble(path)
+        except (RuntimeError, KeyError, UnicodeDecodeError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
             continue
-        r['MR'] = parse_money(r.get('Market Rent'))
-        r['SCH'] = parse_money(r.get('Scheduled Charges'))
-        rows.append(r)
-    return rows
-
-
-def summarize(rows):
-    groups = defaultdict(list)
-    for r in rows:
-        groups[r.get('Unit Type', '').strip()].append(r)
-
-    summary = []
-    for fp in sorted(groups.keys()):
-        g = groups[fp]
-        total = len(g)
-        vacant = sum(1 for r in g if (r.get('Unit Status') or '').startswith('Vacant'))
-        vacpct = round((vacant / total) * 100, 1) if total else 0.0
-        mr_sum = round(sum(r['MR'] for r in g), 2)
-        sch_sum = round(sum(r['SCH'] for r in g), 2)
-        summary.append({
-            'Floorplan': fp,
-            'Units': total,
-            'Vacant': vacant,
-            'Vacancy%': vacpct,
-            'MarketRent_Sum': mr_sum,
-            'ScheduledRent_Sum': sch_sum,
-        })
-
-    total_units = len(rows)
-    total_vacant = sum(1 for r in rows if (r.get('Unit Status') or '').startswith('Vacant'))
-    total_vacpct = round((total_vacant / total_units) * 100, 1) if total_units else 0.0
-    overall = {
-        'Floorplan': 'TOTAL',
-        'Units': total_units,
-        'Vacant': total_vacant,
-        'Vacancy%': total_vacpct,
-        'MarketRent_Sum': round(sum(r['MR'] for r in rows), 2),
-        'ScheduledRent_Sum': round(sum(r['SCH'] for r in rows), 2),
-    }
-
+        frames.append(df.assign(Source=path, Property=name, **{'As Of': as_of}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# Units, vacancies and rent sums per group in one groupby; keys are columns of `df`, e.g.
+# ['Source', 'Unit Type'] for every floorplan of every snapshot at once
+def aggregate(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    g = df[keys].apply(lambda c: c.fillna('').astype(str).str.strip())
+    g['Vacant'] = df['Unit Status'].fillna('').str.startswith('Vacant')
+    g['MR'], g['SCH'] = df['MR'], df['SCH']
+    out = g.groupby(keys, sort=True).agg(Units=('Vacant', 'size'), Vacant=('Vacant', 'sum'),
+                                         MarketRent_Sum=('MR', 'sum'), ScheduledRent_Sum=('SCH', 'sum'))
+    out['Vacant'] = out['Vacant'].astype(int)
+    # Per group, not per row: Python rounding keeps the report's figures exactly as before
+    out['Vacancy%'] = [round(v / n * 100, 1) if n else 0.0 for v, n in zip(out['Vacant'], out['Units'])]
+    out['MarketRent_Sum'] = out['MarketRent_Sum'].map(lambda v: round(v, 2))
+    out['ScheduledRent_Sum'] = out['ScheduledRent_Sum'].map(lambda v: round(v, 2))
+    return out[SUMMARY_COLUMNS]
+
+
+# Report rows for one grouping: (rows keyed 'Floorplan', TOTAL row)
+def summarize(df: pd.DataFrame, by: str = 'Unit Type'):
+    per = aggregate(df, [by])
+    total = aggregate(df.assign(_all='TOTAL'), ['_all'])
+    summary = [dict(Floorplan=k, **row) for k, row in zip(per.index, per.to_dict('records'))]
+    overall = dict(Floorplan='TOTAL', **total.iloc[0].to_dict())
+    overall['Units'], overall['Vacant'] = int(overall['Units']), int(overall['Vacant'])
     return summary, overall
 
 
@@ -85,9 +111,9 @@ def fmt_money(n):
     return f"{n:,.2f}"
 
 
-def print_report(summary, overall):
+def print_report(summary, overall, label: str = 'Floorplan'):
     headers = (
-        ('Floorplan', 30),
+        (label, 30),
         ('Units', 7),
         ('Vacant', 8),
         ('Vac%', 7),
@@ -97,7 +123,7 @@ def print_report(summary, overall):
     # Header
     line = []
     for h, w in headers:
-        align = '>' if h != 'Floorplan' else '<'
+        align = '>' if h != label else '<'
         line.append(f"{h:{align}{w}}")
     print(' '.join(line))
     print('-' * (sum(w for _, w in headers) + len(headers) - 1))
@@ -109,8 +135,49 @@ def print_report(summary, overall):
     print(f"{overall['Floorplan']:<30} {overall['Units']:>7} {overall['Vacant']:>8} {overall['Vacancy%']:>7.1f} {fmt_money(overall['MarketRent_Sum']):>20} {fmt_money(overall['ScheduledRent_Sum']):>22}")
 
 
+def title(name: str, as_of) -> str:
+    return f"{name}{' as of ' + as_of.strftime('%m/%d/%Y') if as_of else ''}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Floorplan occupancy and rent summary from rent roll exports.')
+    p.add_argument('paths', nargs='*', default=[DEFAULT_PATH],
+                   help='Rent roll CSVs and/or directories of them (several properties or dates)')
+    p.add_argument('--output-csv', help='Also write every snapshot\'s floorplan summary to this CSV')
+    args = p.parse_args(argv)
+
+    df = load_rent_rolls(args.paths)
+    if df.empty:
+        print("ERROR: No rent roll rows found.", file=sys.stderr)
+        sys.exit(1)
+
+    # Floorplan and total figures for every snapshot come out of one groupby each; reports are slices
+    per_fp = aggregate(df, ['Source', 'Unit Type'])
+    totals = aggregate(df, ['Source']).to_dict('index')
+    snapshots = df.drop_duplicates('Source')[['Source', 'Property', 'As Of']]
+    for i, (source, name, as_of) in enumerate(snapshots.itertuples(index=False)):
+        if i:
+            print()
+        heading = title(name, as_of) if name or as_of else (source if len(snapshots) > 1 else '')
+        if heading:
+            print(f"{heading}\n")
+        rows = per_fp.loc[source]
+        summary = [dict(Floorplan=k, **r) for k, r in zip(rows.index, rows.to_dict('records'))]
+        print_report(summary, dict(Floorplan='TOTAL', **totals[source]))
+
+    # Portfolio: each property's latest snapshot, one row per property
+    if snapshots['Property'].nunique() > 1:
+        latest = snapshots.sort_values('As Of', na_position='first').drop_duplicates('Property', keep='last')
+        print("\nPortfolio (latest snapshot per property)\n")
+        print_report(*summarize(df[df['Source'].isin(latest['Source'])], by='Property'), label='Property')
+
+    if args.output_csv:
+        out = per_fp.reset_index().rename(columns={'Unit Type': 'Floorplan'})
+        out = snapshots.merge(out, on='Source')
+        out['As Of'] = pd.to_datetime(out['As Of']).dt.strftime('%Y-%m-%d')
+        out.to_csv(args.output_csv, index=False)
+        print(f"\nWrote {len(out)} rows to {args.output_csv}")
+
+
 if __name__ == '__main__':
-    path = sys.argv[1] if len(sys.argv) > 1 else 'Rent Roll (4)(Meridian On Main).csv'
-    rows = load_rows(path)
-    summary, overall = summarize(rows)
-    print_report(summary, overall)
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from sheet_io import read_sheet, sheet_names, write_columnar
+
+MANIFEST_PATH = '.xlsx_convert_manifest.json'
+FORMATS = ('csv', 'parquet', 'feather')
+
+Job = Tuple[str, Optional[str], str, List[str], Optional[List[str]]]
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_PATH) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# Worker: one (workbook, sheet) -> every requested format. Runs in a separate process.
+def convert_one(job: Job) -> Tuple[int, List[str]]:
+    in_path, sheet, out_base, formats, must_have = job
+    candidates = [{'must_have': must_have}] if must_have else None
+    try:
+        _, _, headers, _, data = read_sheet(in_path, candidates, sheet)
+    except Exception:
+        if candidates is not None:
+            raise
+        # Not one of the known address layouts: take the first non-empty row as the header
+        _, _, headers, _, data = read_sheet(in_path, [], sheet)
+    rows = [list(r)[:len(headers)] for r in data if any(v is not None and v != '' for v in r)]
+    written = []
+    for fmt in formats:
+        path = f"{out_base}.{fmt}"
+        if fmt == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                writer.writerows(rows)
+        elif not write_columnar(path, headers, rows, fmt):
+            continue
+        written.append(path)
+    return len(rows), written
+
+
+def output_base(base: str, sheet: Optional[str], multi_sheet: bool) -> str:
+    return f"{base} - {sheet}" if multi_sheet and sheet else base
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description='Convert workbooks to CSV/Parquet, skipping inputs whose content is unchanged.')
+    p.add_argument('inputs', nargs='+', help='Input workbooks (.xlsx)')
+    p.add_argument('-o', '--output', action='append', default=[],
+                   help='Output path, once per input in order; the extension follows --format (default: <input>.<format>)')
+    p.add_argument('--sheet', action='append', default=[],
+                   help="Sheet to convert (repeatable; 'all' for every sheet; default: the active sheet)")
+    p.add_argument('--format', default='csv', help=f"Comma-separated formats from {', '.join(FORMATS)} (default: csv)")
+    p.add_argument('--must-have', help='Comma-separated columns that identify the header row (default: known layouts, '
+                                       'then the first non-empty row)')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.add_argument('--force', action='store_true', help='Convert even if the manifest says nothing changed')
+    p.add_argument('--manifest', default=MANIFEST_PATH)
+    args = p.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.format.split(',') if f.strip()]
+    bad = [f for f in formats if f not in FORMATS]
+    if bad or not formats:
+        p.error(f"unknown --format {bad}; choose from {', '.join(FORMATS)}")
+    if args.output and len(args.output) != len(args.inputs):
+        p.error('--output must be given once per input')
+    must_have = [c.strip() for c in args.must_have.split(',')] if args.must_have else None
+    outputs = [os.path.splitext(o)[0] for o in args.output] or [None] * len(args.inputs)
+
+    manifest = load_manifest(args.manifest)
+    jobs: List[Job] = []
+    job_keys: List[Tuple[str, str]] = []
+    skipped = 0
+    converted = 0
+    for in_path, out in zip(args.inputs, outputs):
+        if not os.path.exists(in_path):
+            print(f"ERROR: File not found: {in_path}", file=sys.stderr)
+            continue
+        digest = file_sha256(in_path)
+        sheets: List[Optional[str]] = args.sheet or [None]
+        if 'all' in sheets:
+            sheets = sheet_names(in_path)
+        for sheet in sheets:
+            out_base = output_base(out or os.path.splitext(in_path)[0], sheet, len(sheets) > 1)
+            key = f"{os.path.abspath(in_path)}::{sheet or ''}::{out_base}"
+            entry = manifest.get(key, {})
+            up_to_date = (entry.get('sha256') == digest and set(formats) <= set(entry.get('formats', []))
+                          and all(os.path.exists(f"{out_base}.{fmt}") for fmt in formats))
+            if up_to_date and not args.force:
+                skipped += 1
+                continue
+            jobs.append((in_path, sheet, out_base, formats, must_have))
+            job_keys.append((key, digest))
+
+    if jobs:
+        workers = max(1, min(args.workers, len(jobs)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(convert_one, job) for job in jobs]
+            for i, fut in enumerate(futures):
+                key, digest = job_keys[i]
+                try:
+                    n, written = fut.result()
+                except Exception as e:
+                    print(f"ERROR: {jobs[i][0]}: {e}", file=sys.stderr)
+                    continue
+                done = {os.path.splitext(w)[1].lstrip('.') for w in written}
+                manifest[key] = {'sha256': digest, 'formats': sorted(done)}
+                converted += 1
+                print(f"Converted {jobs[i][0]} -> {', '.join(written)} ({n} rows)")
+        save_manifest(manifest, args.manifest)
+    print(f"{converted} converted, {skipped} unchanged")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import csv
+import os
+import re
+import sys
+from collections import defaultdict
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ZIP_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zip_centroids.csv')
+
+# Geocoded outputs used to (re)build the bundled table when no Census gazetteer file is given
+DEFAULT_SOURCES = [
+    'Bothell_with_distances.csv',
+    'Bothell_Transfer_with_distances.csv',
+    'FirstYear_with_distances.csv',
+    'Future_resident_with_distances.csv',
+    'Past_resident_with_distances.csv',
+    'Past_resident_2324_with_distances.csv',
+]
+ZIP_HEADERS = ['ZipCode', 'Postal Code', 'GEOID']
+US_COUNTRIES = {'', 'us', 'usa', 'united states', 'united states of america'}
+
+ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+
+Coords = Tuple[Optional[float], Optional[float]]
+
+
+def extract_zip(address: object) -> Optional[int]:
+    matches = ZIP_RE.findall(str(address or ''))
+    # The ZIP follows the street number, so the last 5-digit token wins
+    return int(matches[-1]) if matches else None
+
+
+# Direct-addressed float64 arrays over the 00000-99999 ZIP space: ~1.6 MB, O(1) lookups. float64 so the
+# table's 6-decimal coordinates come back exactly as written (float32 adds noise past the 5th decimal)
+class ZipCentroidIndex:
+    def __init__(self, path: str = ZIP_TABLE_PATH):
+        self.lat = np.full(100000, np.nan, dtype=np.float64)
+        self.lon = np.full(100000, np.nan, dtype=np.float64)
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            rows = [(int(r['zip']), float(r['lat']), float(r['lon'])) for r in reader]
+        if rows:
+            zips, lats, lons = (np.array(col) for col in zip(*rows))
+            self.lat[zips] = lats
+            self.lon[zips] = lons
+        self.size = len(rows)
+
+    def lookup(self, zip5: Optional[int]) -> Coords:
+        if zip5 is None or not 0 <= zip5 < 100000 or np.isnan(self.lat[zip5]):
+            return None, None
+        return float(self.lat[zip5]), float(self.lon[zip5])
+
+
+_default_index: Optional[ZipCentroidIndex] = None
+
+
+def get_index() -> ZipCentroidIndex:
+    global _default_index
+    if _default_index is None:
+        _default_index = ZipCentroidIndex()
+    return _default_index
+
+
+# Offline drop-in for geocode_cache.geocode with ZIP-level accuracy
+def geocode_zip(address: str) -> Coords:
+    return get_index().lookup(extract_zip(address))
+
+
+# Batch variant: one fancy-indexing pass over the centroid arrays
+def geocode_zip_many(addresses: Sequence[str]) -> List[Coords]:
+    index = get_index()
+    zips = np.array([z if z is not None else -1 for z in map(extract_zip, addresses)], dtype=np.int64)
+    valid = zips >= 0
+    lat = np.full(len(zips), np.nan, dtype=np.float64)
+    lon = np.full(len(zips), np.nan, dtype=np.float64)
+    lat[valid] = index.lat[zips[valid]]
+    lon[valid] = index.lon[zips[valid]]
+    return [(None, None) if np.isnan(a) else (float(a), float(o)) for a, o in zip(lat, lon)]
+
+
+def read_centroids(path: str) -> Iterable[Tuple[int, float, float]]:
+    # Census ZCTA gazetteer (tab separated, GEOID/INTPTLAT/INTPTLONG)
+    if path.endswith('.txt'):
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter='\t')
+            header = [h.strip() for h in next(reader)]
+            zi, lai, loi = header.index('GEOID'), header.index('INTPTLAT'), header.index('INTPTLONG')
+            for row in reader:
+                yield int(row[zi]), float(row[lai]), float(row[loi])
+        return
+    # *_with_distances.csv: average the geocoded points that fall in each ZIP
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        zi = next((header.index(h) for h in ZIP_HEADERS if h in header), None)
+        if zi is None or 'Latitude' not in header:
+            print(f"Skipping {path}: no ZIP/Latitude columns")
+            return
+        lai, loi = header.index('Latitude'), header.index('Longitude')
+        ci = header.index('Country') if 'Country' in header else None
+        for row in reader:
+            if len(row) <= max(zi, lai, loi):
+                continue
+            if ci is not None and row[ci].strip().lower() not in US_COUNTRIES:
+                continue
+            zip5 = extract_zip(row[zi])
+            try:
+                lat, lon = float(row[lai]), float(row[loi])
+            except ValueError:
+                continue
+            if zip5 is not None:
+                yield zip5, lat, lon
+
+
+def build_table(sources: Iterable[str], out_path: str = ZIP_TABLE_PATH) -> int:
+    acc = defaultdict(lambda: [0.0, 0.0, 0])
+    for path in sources:
+        if not os.path.exists(path):
+            print(f"Skipping {path}: not found")
+            continue
+        for zip5, lat, lon in read_centroids(path):
+            a = acc[zip5]
+            a[0] += lat
+            a[1] += lon
+            a[2] += 1
+    with open(out_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['zip', 'lat', 'lon'])
+        for zip5 in sorted(acc):
+            s_lat, s_lon, n = acc[zip5]
+            writer.writerow([f"{zip5:05d}", round(s_lat / n, 6), round(s_lon / n, 6)])
+    print(f"Wrote {len(acc)} ZIP centroids to {out_path}")
+    return len(acc)
+
+
+if __name__ == '__main__':
+    # python zip_centroids.py [2020_Gaz_zcta_national.txt | *_with_distances.csv ...]
+    build_table(sys.argv[1:] or DEFAULT_SOURCES)